@@ -1,56 +1,22 @@
-import json
-import math
-import numpy as np
 import networkx as nx
 import pandas as pd
 from matplotlib import pyplot as plt
 from scipy.stats import kendalltau
-from viral_centrality import viral_centrality 
-from collections import defaultdict
-
-
-with open('congress_network_data.json') as f:
-    data = json.load(f)
-
-inList = data[0]['inList']
-inWeight = data[0]['inWeight']
-outList = data[0]['outList']
-outWeight = data[0]['outWeight']
-usernameList = data[0]['usernameList']
-
-# Create a directed graph
-G = nx.DiGraph()
-for i, username in enumerate(usernameList):
-    G.add_node(i, username=username)
-
-# Add edges with weights
-for i, (out_nodes, weights) in enumerate(zip(outList, outWeight)):
-    for j, weight in zip(out_nodes, weights):
-        G.add_edge(i, j, weight=weight)
-
-# Function to run ICM simulation
-def run_icm_simulation(G, num_simulations=10000):
-    spread_sizes = {node: 0 for node in G.nodes}
-    for seed_node in G.nodes:
-        total_activated = 0
-        for _ in range(num_simulations):
-            activated = {seed_node}
-            newly_activated = {seed_node}
-            while newly_activated:
-                next_activated = set()
-                for node in newly_activated:
-                    for neighbor in G.successors(node):
-                        if neighbor not in activated and np.random.rand() < G[node][neighbor]['weight']:
-                            next_activated.add(neighbor)
-                activated.update(next_activated)
-                newly_activated = next_activated
-            total_activated += len(activated)
-        spread_sizes[seed_node] = total_activated / num_simulations
-    return spread_sizes
+from viral_centrality import viral_centrality_csr
+from graph_loader import load_graph, to_networkx
+from icm import icm_spread
+from pagerank import weighted_pagerank_centrality
+from path_centrality import prob_betweenness_centrality, prob_closeness_centrality
+
+
+graph = load_graph('congress_network_data.json')
+
+# Create a directed graph with weighted edges
+G = to_networkx(graph, label='username')
 
 # Monte Carlo ground truth
 num_simulations = 10000  # Reduced to 1000 for debugging
-avg_spread = run_icm_simulation(G, num_simulations)
+avg_spread = dict(enumerate(icm_spread(graph.out_indptr, graph.out_indices, graph.out_weights, num_simulations, random_seed=0)))
 ground_truth_ranking = sorted(avg_spread, key=avg_spread.get, reverse=True)
 
 # Calculate other centralities
@@ -61,7 +27,7 @@ except nx.PowerIterationFailedConvergence:
 
 # Compute viral centrality inline
 tol = 0.001
-viral_centrality_values = viral_centrality(inList, inWeight, outList, Niter=-1, tol=tol)
+viral_centrality_values = viral_centrality_csr(graph.in_indptr, graph.in_indices, graph.in_weights, Niter=-1, tol=tol)
 
 print("Viral Centrality Values:", viral_centrality_values)
 
@@ -75,40 +41,6 @@ eigenvector_ranking = get_ranking_from_dict(eigenvector_centrality)
 viral_ranking = get_ranking_from_list(viral_centrality_values)
 
 # Compute weighted PageRank centrality
-def weighted_pagerank_centrality(G, alpha=0.85, max_iter=100, tol=1.0e-6):
-    N = len(G)
-    if N == 0:
-        return {}
-
-    pr = {node: 1.0 / N for node in G.nodes()}
-
-    out_strength = {}
-    for node in G.nodes():
-        total_weight_out = 0.0
-        for nbr in G.successors(node):
-            total_weight_out += G[node][nbr].get('weight', 0.0)
-        out_strength[node] = total_weight_out
-
-    for _ in range(max_iter):
-        prev_pr = pr.copy()
-        for node in pr:
-            pr[node] = (1.0 - alpha) / N
-
-        for node in G.nodes():
-            if out_strength[node] == 0:
-                for n2 in pr:
-                    pr[n2] += alpha * (prev_pr[node] / N)
-            else:
-                for nbr in G.successors(node):
-                    w = G[node][nbr].get('weight', 0.0)
-                    pr[nbr] += alpha * (prev_pr[node] * (w / out_strength[node]))
-
-        diff = sum(abs(pr[n] - prev_pr[n]) for n in pr)
-        if diff < tol:
-            break
-
-    return pr
-
 weighted_pagerank = weighted_pagerank_centrality(G)
 weighted_pagerank_ranking = get_ranking_from_dict(weighted_pagerank)
 
@@ -121,76 +53,6 @@ def prob_degree_centrality(G):
         centrality[node] = out_prob + in_prob
     return centrality
 
-def prob_betweenness_centrality(G):
-    betweenness = defaultdict(float)
-    nodes = list(G.nodes())
-    
-    log_w = {}
-    for u, v in G.edges():
-        log_w[(u, v)] = math.log(G[u][v]['weight']) if G[u][v]['weight'] > 0 else float('-inf')
-
-    for s in nodes:
-        dist = {n: float('inf') for n in nodes}
-        predecessor = {n: None for n in nodes}
-        dist[s] = 0
-        
-        unvisited = set(nodes)
-        while unvisited:
-            current = min(unvisited, key=lambda x: dist[x])
-            unvisited.remove(current)
-            if dist[current] == float('inf'):
-                break
-            for nbr in G.successors(current):
-                cost = dist[current] + (-log_w.get((current, nbr), float('-inf')))
-                if cost < dist[nbr]:
-                    dist[nbr] = cost
-                    predecessor[nbr] = current
-        
-        for t in nodes:
-            if t == s or dist[t] == float('inf'):
-                continue
-            path_nodes = []
-            cur = t
-            while cur is not None:
-                path_nodes.append(cur)
-                cur = predecessor[cur]
-            path_nodes.reverse()
-            for n in path_nodes:
-                betweenness[n] += 1
-    
-    return dict(betweenness)
-
-def prob_closeness_centrality(G):
-    import math
-    
-    closeness = {}
-    nodes = list(G.nodes())
-
-    log_w = {}
-    for u, v in G.edges():
-        log_w[(u, v)] = -math.log(G[u][v]['weight']) if G[u][v]['weight'] > 0 else float('inf')
-
-    for s in nodes:
-        dist = {n: float('inf') for n in nodes}
-        dist[s] = 0
-        visited = set()
-        while len(visited) < len(nodes):
-            current = min((x for x in nodes if x not in visited), key=lambda x: dist[x])
-            visited.add(current)
-            if dist[current] == float('inf'):
-                break
-            for nbr in G.successors(current):
-                d = dist[current] + log_w.get((current, nbr), float('inf'))
-                if d < dist[nbr]:
-                    dist[nbr] = d
-        total = sum(x for x in dist.values() if x < float('inf'))
-        if total > 0 and total < float('inf'):
-            closeness[s] = (len(nodes) - 1) / total
-        else:
-            closeness[s] = 0.0
-
-    return closeness
-
 prob_degree = prob_degree_centrality(G)
 prob_betweenness = prob_betweenness_centrality(G)
 prob_closeness = prob_closeness_centrality(G)
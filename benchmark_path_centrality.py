@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""benchmark_path_centrality.py
+Times the probabilistic betweenness and closeness centrality in
+path_centrality.py against the original O(N^3) implementations (kept below
+as the reference) on the Congress network, and reports how far they differ.
+Closeness agrees exactly. Betweenness differs only where several shortest
+paths tie, which the Brandes implementation splits fractionally while the
+reference credits a single path.
+"""
+import json
+import math
+import time
+import networkx as nx
+from collections import defaultdict
+import path_centrality
+
+def reference_prob_betweenness_centrality(G):
+    betweenness = defaultdict(float)
+    nodes = list(G.nodes())
+    
+    log_w = {}
+    for u, v in G.edges():
+        log_w[(u, v)] = math.log(G[u][v]['weight']) if G[u][v]['weight'] > 0 else float('-inf')
+
+    for s in nodes:
+        dist = {n: float('inf') for n in nodes}
+        predecessor = {n: None for n in nodes}
+        dist[s] = 0
+        
+        unvisited = set(nodes)
+        while unvisited:
+            current = min(unvisited, key=lambda x: dist[x])
+            unvisited.remove(current)
+            if dist[current] == float('inf'):
+                break
+            for nbr in G.successors(current):
+                cost = dist[current] + (-log_w.get((current, nbr), float('-inf')))
+                if cost < dist[nbr]:
+                    dist[nbr] = cost
+                    predecessor[nbr] = current
+        
+        for t in nodes:
+            if t == s or dist[t] == float('inf'):
+                continue
+            path_nodes = []
+            cur = t
+            while cur is not None:
+                path_nodes.append(cur)
+                cur = predecessor[cur]
+            path_nodes.reverse()
+            for n in path_nodes:
+                betweenness[n] += 1
+    
+    return dict(betweenness)
+
+def reference_prob_closeness_centrality(G):
+    import math
+    
+    closeness = {}
+    nodes = list(G.nodes())
+
+    log_w = {}
+    for u, v in G.edges():
+        log_w[(u, v)] = -math.log(G[u][v]['weight']) if G[u][v]['weight'] > 0 else float('inf')
+
+    for s in nodes:
+        dist = {n: float('inf') for n in nodes}
+        dist[s] = 0
+        visited = set()
+        while len(visited) < len(nodes):
+            current = min((x for x in nodes if x not in visited), key=lambda x: dist[x])
+            visited.add(current)
+            if dist[current] == float('inf'):
+                break
+            for nbr in G.successors(current):
+                d = dist[current] + log_w.get((current, nbr), float('inf'))
+                if d < dist[nbr]:
+                    dist[nbr] = d
+        total = sum(x for x in dist.values() if x < float('inf'))
+        if total > 0 and total < float('inf'):
+            closeness[s] = (len(nodes) - 1) / total
+        else:
+            closeness[s] = 0.0
+
+    return closeness
+
+with open('congress_network_data.json') as f:
+    data = json.load(f)
+
+G = nx.DiGraph()
+for i, username in enumerate(data[0]['usernameList']):
+    G.add_node(i, username=username)
+for i, (out_nodes, weights) in enumerate(zip(data[0]['outList'], data[0]['outWeight'])):
+    for j, weight in zip(out_nodes, weights):
+        G.add_edge(i, j, weight=weight)
+
+for name, reference, heap_based in [('betweenness', reference_prob_betweenness_centrality, path_centrality.prob_betweenness_centrality),
+                                    ('closeness', reference_prob_closeness_centrality, path_centrality.prob_closeness_centrality)]:
+    start = time.perf_counter()
+    expected = reference(G)
+    reference_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = heap_based(G)
+    heap_time = time.perf_counter() - start
+    max_difference = max(abs(result.get(node, 0) - expected.get(node, 0)) for node in G.nodes())
+    print(f"{name}: reference {reference_time:.2f} s, heap {heap_time:.2f} s ({reference_time / heap_time:.0f}x), max difference: {max_difference:g}")
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""benchmark_viral_centrality.py
+Times the viral centrality implementations in viral_centrality.py on the
+Congress network and on synthetic random networks of 10k and 100k nodes.
+Since a full run over every seed node is far too slow for the plain Python
+loops at these sizes, each implementation is timed on a sample of seed nodes
+and the time per seed is reported.
+"""
+import json
+import time
+import numpy as np
+import viral_centrality as vc
+from csr import out_edge_order
+
+n_seeds = 20 #number of seed nodes timed for the fast implementations
+n_python_seeds = 3 #number of seed nodes timed for the original viral_centrality
+tol = 0.001
+avg_degree = 28 #roughly the average degree of the Congress network
+
+def synthetic_network(N, avg_degree, rng):
+    ''' Random directed network with Poisson out-degrees and uniformly distributed transmission probabilities,
+    scaled so that the average out-strength is similar to the Congress network (about 0.16). '''
+    E = rng.poisson(avg_degree * N)
+    sources = rng.integers(0, N, E)
+    targets = rng.integers(0, N, E)
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    weights = rng.uniform(0, 0.32 / avg_degree, sources.size)
+    order = np.lexsort((sources, targets))
+    in_indptr = np.zeros(N+1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=N), out=in_indptr[1:])
+    order_out = np.lexsort((targets, sources))
+    out_indptr = np.zeros(N+1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=N), out=out_indptr[1:])
+    return in_indptr, sources[order], weights[order], out_indptr, targets[order_out]
+
+def congress_network():
+    f = open('congress_network_data.json')
+    data = json.load(f)
+    in_indptr, in_indices, in_weights = vc.adjacency_to_csr(data[0]['inList'], data[0]['inWeight'])
+    out_indptr, out_indices, _ = vc.adjacency_to_csr(data[0]['outList'])
+    return in_indptr, in_indices, in_weights, out_indptr, out_indices
+
+def nested_lists(indptr, indices, weights = None):
+    ''' Adjacency lists as used by viral_centrality (eg inList, inWeight) from CSR arrays. '''
+    adjList = [indices[indptr[i]:indptr[i+1]].tolist() for i in range(len(indptr)-1)]
+    if weights is None:
+        return adjList
+    return adjList, [weights[indptr[i]:indptr[i+1]].tolist() for i in range(len(indptr)-1)]
+
+def time_per_seed(func, seeds):
+    start = time.perf_counter()
+    func(seeds)
+    return (time.perf_counter() - start) / len(seeds)
+
+rng = np.random.default_rng(0)
+networks = [('Congress (N=475)', congress_network()),
+            ('synthetic N=10k', synthetic_network(10000, avg_degree, rng)),
+            ('synthetic N=100k', synthetic_network(100000, avg_degree, rng))]
+
+if vc._viral_centrality_kernel_jit is not None: #compile once before timing
+    vc._viral_centrality_kernel_jit(*networks[0][1], np.arange(1), -1, 1.0, tol)
+
+print(f"{'network':<20}{'original (s/seed)':>20}{'sparse (s/seed)':>18}{'numba (s/seed)':>18}{'numba speedup':>16}")
+for name, (in_indptr, in_indices, in_weights, out_indptr, out_indices) in networks:
+    N = len(in_indptr)-1
+    seeds = rng.choice(N, n_seeds, replace=False)
+
+    inList, inWeight = nested_lists(in_indptr, in_indices, in_weights)
+    outList = nested_lists(out_indptr, out_indices)
+    with np.errstate(invalid='ignore'): #viral_centrality divides 0 by 0 for the seed node, which its nanmax skips
+        python_time = time_per_seed(lambda s: vc.viral_centrality(inList, inWeight, outList, Niter = -1, tol = tol, seeds = s), seeds[:n_python_seeds])
+
+    edge_order = out_edge_order(in_indptr, in_indices)
+    sparse_time = time_per_seed(lambda s: vc._seed_chunk(edge_order, in_indices, in_weights, s, -1, tol), seeds)
+
+    if vc._viral_centrality_kernel_jit is not None:
+        numba_time = time_per_seed(lambda s: vc._viral_centrality_kernel_jit(in_indptr, in_indices, in_weights, out_indptr, out_indices, s, -1, 1.0, tol), seeds)
+        print(f"{name:<20}{python_time:>20.4g}{sparse_time:>18.4g}{numba_time:>18.4g}{python_time / numba_time:>15.0f}x")
+    else:
+        print(f"{name:<20}{python_time:>20.4g}{sparse_time:>18.4g}{'(no numba)':>18}{'':>16}")
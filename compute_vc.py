@@ -8,23 +8,16 @@ Uses the function in viral_centrality.py
 @author Christian G. Fink
 @date 7/15/23
 """
-from viral_centrality import viral_centrality
-import json
+from viral_centrality import viral_centrality_csr
+from graph_loader import load_graph
 import numpy as np
 from matplotlib import pyplot as plt
 
 tol = 0.001
 
-f = open('congress_network_data.json')
-data = json.load(f)
+graph = load_graph('congress_network_data.json')
 
-inList = data[0]['inList']
-inWeight = data[0]['inWeight']
-outList = data[0]['outList']
-outWeight = data[0]['outWeight']
-usernameList = data[0]['usernameList']
-
-num_activated = viral_centrality(inList, inWeight, outList, Niter = -1, tol = tol)
+num_activated = viral_centrality_csr(graph.in_indptr, graph.in_indices, graph.in_weights, Niter = -1, tol = tol)
 
 plt.scatter(np.array(range(len(num_activated))),num_activated,color='red',label='Viral Centrality')
 plt.xlabel('Node ID',fontsize=15)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""csr.py
+Small helpers for networks stored as compressed sparse row (CSR) arrays
+(indptr, indices[, weights]), as returned by viral_centrality.adjacency_to_csr:
+the neighbours of node i are indices[indptr[i]:indptr[i+1]], and a process
+pool whose workers memory-map such arrays instead of receiving pickled copies.
+Used by viral_centrality.py, icm.py, ris.py, pagerank.py and path_centrality.py
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+
+def out_edge_order(indptr, indices):
+    ''' Regroups the incoming connections in CSR form by source node. Returns out_indptr and out_edges such that
+    out_edges[out_indptr[j]:out_indptr[j+1]] are the positions (in indices/weights) of the connections sent by node j,
+    together with the target node of every connection position. '''
+    N = len(indptr)-1
+    targets = np.repeat(np.arange(N), np.diff(indptr))
+    out_edges = np.argsort(indices, kind='stable')
+    out_indptr = np.zeros(N+1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=N), out=out_indptr[1:])
+    return out_indptr, out_edges, targets
+
+def gather_ranges(indptr, nodes):
+    ''' Concatenation of the CSR ranges indptr[n]:indptr[n+1] for the given nodes, and the node each position belongs to. '''
+    lengths = indptr[nodes+1] - indptr[nodes]
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(lengths.sum()) - np.repeat(offsets - indptr[nodes], lengths)
+    return positions, np.repeat(nodes, lengths)
+
+worker_state = {} #arrays of a pool worker, set up once by _init_worker
+
+def _init_worker(array_dir, names, setup):
+    arrays = {name: np.load(os.path.join(array_dir, name + '.npy'), mmap_mode='r') for name in names}
+    worker_state.update(arrays if setup is None else setup(**arrays))
+
+@contextmanager
+def shared_array_pool(workers, arrays, setup = None):
+    ''' Process pool of 'workers' processes sharing the arrays in the dict 'arrays' (eg {'indptr': ..., 'indices': ..., 'weights': ...}).
+    The arrays are written once to a temporary directory as .npy files, and every worker memory-maps them when it starts, so they are
+    not pickled for every task. In a worker the memory maps are in worker_state, keyed like 'arrays'; if 'setup' is given (a module-level
+    function, or a functools.partial of one), worker_state holds the dict returned by setup(**memory maps) instead, for per-worker
+    data derived from the arrays. The directory is removed when the pool is shut down. '''
+    with tempfile.TemporaryDirectory() as array_dir:
+        for name, array in arrays.items():
+            np.save(os.path.join(array_dir, name + '.npy'), np.asarray(array))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(array_dir, list(arrays), setup)) as pool:
+            yield pool
@@ -1,34 +1,14 @@
-import json
 import networkx as nx
+from graph_loader import load_graph, read_edgelist, graph_edges, graph_from_edges, merge_edges, describe_merge, to_networkx
 
-with open('congress_network_data.json', 'r') as f:
-    data = json.load(f)
+graph = load_graph('congress_network_data.json')
 
-data_dict = data[0]  
-inList = data_dict['inList']
-inWeight = data_dict['inWeight']
-outList = data_dict['outList']
-outWeight = data_dict['outWeight']
-usernameList = data_dict['usernameList']
+# Connections of the JSON adjacency and the edge list file, merged once (edge list weights win)
+merge = merge_edges(graph_edges(graph), read_edgelist('congress.edgelist'), len(graph.usernames))
+print(describe_merge(merge, 'congress_network_data.json', 'congress.edgelist'))
 
-G = nx.DiGraph()
-
-# Add nodes with labels
-for i, username in enumerate(usernameList):
-    G.add_node(i, label=username)
-
-for i, out_nodes in enumerate(outList):
-    for j, target in enumerate(out_nodes):
-        G.add_edge(i, target, weight=outWeight[i][j])
-
-with open('congress.edgelist', 'r') as f:
-    for line in f:
-        parts = line.strip().split()
-        if len(parts) == 3:
-            source = int(parts[0])
-            target = int(parts[1])
-            weight = float(parts[2].split(':')[1].strip('}'))
-            G.add_edge(source, target, weight=weight)
+# Nodes with labels and edges with weights
+G = to_networkx(graph_from_edges(merge.sources, merge.targets, merge.weights, graph.usernames))
 
 nx.write_gexf(G, 'congress_network.gexf')
 
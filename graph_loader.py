@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""graph_loader.py
+Shared loader for congress_network_data.json. Returns the network as CSR
+arrays of incoming and outgoing connections (see viral_centrality.adjacency_to_csr)
+instead of nested lists, and keeps a binary cache of those arrays next to the
+data, keyed on the SHA-256 of the JSON file, so that later loads memory-map
+.npy files instead of parsing JSON.
+
+The cache entries use the graph store format below, which can also hold
+networks that do not fit in memory: every array is a plain .npy file that is
+opened with np.load(mmap_mode='r'), so viral_centrality_csr, icm_spread,
+pagerank_csr etc. can run on it directly.
+
+Graph store format (version 1), a directory holding:
+    format.json       {"format": "csr-graph", "version": 1, "num_nodes": N, "num_edges": E,
+                       "index_dtype": ..., "weight_dtype": ...}
+    out_indptr.npy    int64[N+1]   outgoing connections of node i are positions out_indptr[i]:out_indptr[i+1]
+    out_indices.npy   index_dtype[E]   target node of each outgoing connection (int32 unless N >= 2**31)
+    out_weights.npy   weight_dtype[E]  transmission probability of each outgoing connection (float32 or float64)
+    in_indptr.npy, in_indices.npy, in_weights.npy
+                      the same connections grouped by target node (source node in in_indices)
+    name_offsets.npy  int64[N+1]   username of node i is names.bin[name_offsets[i]:name_offsets[i+1]]
+    names.bin         UTF-8 bytes of all usernames, concatenated
+With int32 indices and float32 weights a connection takes 16 bytes for both directions together.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import namedtuple
+import numpy as np
+import networkx as nx
+from viral_centrality import adjacency_to_csr
+
+CSRGraph = namedtuple('CSRGraph', ['in_indptr', 'in_indices', 'in_weights', 'out_indptr', 'out_indices', 'out_weights', 'usernames'])
+CSRGraph.__doc__ = ''' The network as CSR arrays: in_indices[in_indptr[i]:in_indptr[i+1]] are the nodes sending connections to node i
+(inList[i]) with weights in_weights[...] (inWeight[i]), and likewise out_* for outList/outWeight. usernames[i] is the username of node i. '''
+
+EdgeMerge = namedtuple('EdgeMerge', ['sources', 'targets', 'weights', 'only_first', 'only_second', 'mismatched', 'first_weights', 'duplicates'])
+EdgeMerge.__doc__ = ''' Result of merge_edges: the merged connections (sources, targets, weights), sorted by (source, target); the positions in
+those arrays of the connections found only in the first list, only in the second list, and in both but with different weights; the
+first list's weights at the 'mismatched' positions (the merged weights are the second list's); and the number of repeated connections
+dropped within each list. '''
+
+STORE_FORMAT = 'csr-graph'
+STORE_VERSION = 1
+_ARRAY_FIELDS = CSRGraph._fields[:-1]
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _stage_store(path):
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    return tempfile.mkdtemp(dir=parent)
+
+def _finish_store(staging, path, usernames, num_edges, index_dtype, weight_dtype, replace):
+    ''' Writes the username table and format.json of a staged store and renames it into place. If 'replace' is true, a graph store
+    already at 'path' is moved aside first and deleted once the new one is in place; otherwise the existing store is kept. '''
+    names = [username.encode('utf-8') for username in usernames]
+    name_offsets = np.zeros(len(names)+1, dtype=np.int64)
+    np.cumsum([len(name) for name in names], out=name_offsets[1:])
+    np.save(os.path.join(staging, 'name_offsets.npy'), name_offsets)
+    with open(os.path.join(staging, 'names.bin'), 'wb') as f:
+        f.write(b''.join(names))
+    with open(os.path.join(staging, 'format.json'), 'w') as f:
+        json.dump({'format': STORE_FORMAT, 'version': STORE_VERSION, 'num_nodes': len(names), 'num_edges': int(num_edges),
+                   'index_dtype': np.dtype(index_dtype).name, 'weight_dtype': np.dtype(weight_dtype).name}, f)
+    aside = None
+    if replace and _is_graph_store(path):
+        aside = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+        os.rename(path, os.path.join(aside, 'store'))
+    try:
+        os.rename(staging, path)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if aside is not None:
+            os.rename(os.path.join(aside, 'store'), path)
+            os.rmdir(aside)
+            raise
+        if not _is_graph_store(path): #anything but another process having written the same store first is a real error
+            raise
+    if aside is not None:
+        shutil.rmtree(aside)
+
+def _is_graph_store(path):
+    try:
+        with open(os.path.join(path, 'format.json')) as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return header.get('format') == STORE_FORMAT and header.get('version') == STORE_VERSION
+
+def write_graph_store(path, graph, index_dtype = None, weight_dtype = np.float32, replace = True):
+    ''' Writes a CSRGraph to the directory 'path' in the graph store format (see the module docstring). index_dtype defaults to
+    int32, or int64 for networks of 2**31 nodes or more; weight_dtype float32 halves the size of the weights, float64 keeps them exact.
+    The store is written to a staging directory and renamed into place, so a store directory is always complete. A graph store already
+    at 'path' is replaced, unless replace = False, in which case it is kept (as for the content-keyed caches of load_graph). '''
+
+    N = len(graph.out_indptr)-1
+    if index_dtype is None:
+        index_dtype = np.int32 if N < 2**31 else np.int64
+    staging = _stage_store(path)
+    dtypes = {'indptr': np.int64, 'indices': index_dtype, 'weights': weight_dtype}
+    for field in _ARRAY_FIELDS:
+        np.save(os.path.join(staging, field + '.npy'), np.asarray(getattr(graph, field), dtype=dtypes[field.split('_')[1]]))
+    _finish_store(staging, path, np.asarray(graph.usernames).tolist(), graph.out_indptr[-1], index_dtype, weight_dtype, replace)
+
+def open_graph_store(path):
+    ''' Opens a graph store as a CSRGraph whose connection arrays are read-only memory maps (only the pages that are touched are
+    read from disk); the usernames are decoded into an array of strings. '''
+    with open(os.path.join(path, 'format.json')) as f:
+        header = json.load(f)
+    if header.get('format') != STORE_FORMAT or header.get('version') != STORE_VERSION:
+        raise ValueError(f"{path} is not a version {STORE_VERSION} graph store")
+    arrays = [np.load(os.path.join(path, field + '.npy'), mmap_mode='r') for field in _ARRAY_FIELDS]
+    with open(os.path.join(path, 'names.bin'), 'rb') as f:
+        names = f.read()
+    name_offsets = np.load(os.path.join(path, 'name_offsets.npy')).tolist()
+    usernames = np.array([names[start:end].decode('utf-8') for start, end in zip(name_offsets[:-1], name_offsets[1:])], dtype=str)
+    return CSRGraph(*arrays, usernames)
+
+def load_graph(path = 'congress_network_data.json', cache_dir = '.graph_cache'):
+    ''' Loads the network in 'path' as a CSRGraph. The arrays are cached as a graph store (with float64 weights, so nothing is
+    rounded) in cache_dir/v<store version>-<SHA-256 of the file>/ and memory-mapped from there on later loads; a changed file gets a new cache entry.
+    Pass cache_dir = None to parse the JSON without caching. '''
+
+    if cache_dir is not None:
+        cache = os.path.join(cache_dir, f'v{STORE_VERSION}-' + _file_hash(path))
+        if os.path.isdir(cache):
+            return open_graph_store(cache)
+
+    with open(path) as f:
+        data = json.load(f)
+    in_indptr, in_indices, in_weights = adjacency_to_csr(data[0]['inList'], data[0]['inWeight'])
+    out_indptr, out_indices, out_weights = adjacency_to_csr(data[0]['outList'], data[0]['outWeight'])
+    graph = CSRGraph(in_indptr, in_indices, in_weights, out_indptr, out_indices, out_weights, np.array(data[0]['usernameList']))
+
+    if cache_dir is not None:
+        write_graph_store(cache, graph, weight_dtype=np.float64, replace=False)
+        return open_graph_store(cache) #same array types as a load from the cache
+    return graph
+
+def _edges_to_csr(rows, cols, weights, N):
+    ''' CSR arrays of the connections grouped by 'rows', keeping their order within each row. '''
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(N+1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=N), out=indptr[1:])
+    return indptr, cols[order], weights[order]
+
+def graph_from_edges(sources, targets, weights, usernames):
+    ''' CSRGraph from flat arrays of connections (eg as returned by read_edgelist), with nodes 0..len(usernames)-1. '''
+    N = len(usernames)
+    sources, targets, weights = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64), np.asarray(weights, dtype=float)
+    if sources.size and max(sources.max(), targets.max()) >= N:
+        raise ValueError(f"connection to node {max(sources.max(), targets.max())} in a network of {N} nodes")
+    return CSRGraph(*_edges_to_csr(targets, sources, weights, N), *_edges_to_csr(sources, targets, weights, N), np.asarray(usernames))
+
+def graph_edges(graph):
+    ''' Flat arrays of the connections of a CSRGraph (sources, targets, weights), grouped by source in CSR order. '''
+    N = len(graph.out_indptr)-1
+    return np.repeat(np.arange(N), np.diff(graph.out_indptr)), np.asarray(graph.out_indices, dtype=np.int64), np.asarray(graph.out_weights, dtype=float)
+
+_EDGELIST_LINE = re.compile(rb"^[ \t]*(\d+)[ \t]+(\d+)[ \t]+\{'weight': ([^}\n]*)\}[ \t\r]*$", re.M)
+
+def _edgelist_error(chunk, path, first_line):
+    ''' Raises a ValueError naming the first line of 'chunk' that is not a valid edge list line. '''
+    for i, line in enumerate(chunk.split(b'\n')):
+        match = _EDGELIST_LINE.fullmatch(line)
+        if match is None and line.strip():
+            raise ValueError(f"{path}, line {first_line+i+1}: expected \"u v {{'weight': w}}\", got {line.decode('utf-8', 'replace')!r}")
+        if match is not None:
+            try:
+                weight = float(match.group(3))
+            except ValueError:
+                weight = float('nan')
+            if not 0 <= weight <= 1:
+                raise ValueError(f"{path}, line {first_line+i+1}: weight {match.group(3).decode('utf-8', 'replace')} is not a transmission probability")
+
+def _parse_edgelist_chunk(chunk, path, first_line):
+    fields = np.array(_EDGELIST_LINE.findall(chunk), dtype=bytes).reshape(-1, 3)
+    if len(fields) != len(re.findall(rb'\S[^\n]*', chunk)): #some non-blank line did not match
+        _edgelist_error(chunk, path, first_line)
+    try:
+        weights = fields[:, 2].astype(float)
+    except ValueError:
+        _edgelist_error(chunk, path, first_line)
+    if not np.all((weights >= 0) & (weights <= 1)):
+        _edgelist_error(chunk, path, first_line)
+    return fields[:, 0].astype(np.int64), fields[:, 1].astype(np.int64), weights
+
+def iter_edgelist(path = 'congress.edgelist', chunk_bytes = 1 << 26):
+    ''' Reads an edge list in NetworkX format (one "u v {'weight': w}" line per connection, as written by nx.write_edgelist) about
+    'chunk_bytes' bytes at a time, and yields the sources, targets and weights of each chunk as arrays, so memory stays bounded however
+    long the file is. Each chunk is matched with one regular expression and converted column by column. Blank lines are skipped; a line
+    in any other format, or a weight that is not a number in [0, 1], raises a ValueError naming the line. '''
+
+    first_line = 0
+    rest = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            chunk = rest + block
+            if block: #keep the last, possibly incomplete, line for the next chunk
+                cut = chunk.rfind(b'\n') + 1
+                chunk, rest = chunk[:cut], chunk[cut:]
+            if chunk:
+                yield _parse_edgelist_chunk(chunk, path, first_line)
+                first_line += chunk.count(b'\n')
+            if not block:
+                break
+
+def read_edgelist(path = 'congress.edgelist', chunk_bytes = 1 << 26):
+    ''' All connections of an edge list in NetworkX format, as arrays of sources, targets and weights in file order (see iter_edgelist). '''
+    chunks = list(iter_edgelist(path, chunk_bytes))
+    if not chunks:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return tuple(np.concatenate(columns) for columns in zip(*chunks))
+
+def _last_unique(keys, weights):
+    ''' Sorted distinct keys, each with the weight of its last occurrence (as when a later add_edge overwrites an earlier one). '''
+    order = np.argsort(keys, kind='stable')
+    keys, weights = keys[order], weights[order]
+    last = np.append(keys[1:] != keys[:-1], True)
+    return keys[last], weights[last]
+
+def merge_edges(first, second, num_nodes, rtol = 1e-9):
+    ''' Merges two lists of connections, each given as (sources, targets, weights) (eg graph_edges of the JSON adjacency and
+    read_edgelist), into one list with every connection once, by a sort-based join on (source, target): both lists are sorted by
+    that key and located in their sorted union by binary search. Where both lists have a connection the second list's weight
+    is kept, as when its edges are added to a NetworkX graph after the first's; weights differing by more than 'rtol' (relative) are
+    reported as mismatches. Within each list a repeated connection keeps its last weight. A node id outside 0..num_nodes-1 in either
+    list raises a ValueError (it would otherwise alias another connection's key). Returns an EdgeMerge. '''
+
+    keys, weights = [], []
+    for name, (sources, targets, w) in (('first', first), ('second', second)):
+        sources, targets = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+        bad = (sources < 0) | (sources >= num_nodes) | (targets < 0) | (targets >= num_nodes)
+        if np.any(bad):
+            e = np.flatnonzero(bad)[0]
+            raise ValueError(f"connection {sources[e]} -> {targets[e]} of the {name} list is outside a network of {num_nodes} nodes")
+        keys.append(sources * num_nodes + targets)
+        weights.append(np.asarray(w, dtype=float))
+    first_keys, first_weights = _last_unique(keys[0], weights[0])
+    second_keys, second_weights = _last_unique(keys[1], weights[1])
+    duplicates = (keys[0].size - first_keys.size, keys[1].size - second_keys.size)
+
+    merged_keys = np.union1d(first_keys, second_keys)
+    first_at = np.searchsorted(merged_keys, first_keys) #position of every connection in the merged list
+    second_at = np.searchsorted(merged_keys, second_keys)
+    in_first = np.zeros(merged_keys.size, dtype=bool)
+    in_first[first_at] = True
+    in_second = np.zeros(merged_keys.size, dtype=bool)
+    in_second[second_at] = True
+
+    merged_weights = np.empty(merged_keys.size)
+    merged_weights[first_at] = first_weights
+    previous = merged_weights[second_at] #first list's weight where it has the connection too
+    merged_weights[second_at] = second_weights
+    differ = in_first[second_at] & ~np.isclose(second_weights, previous, rtol=rtol, atol=0)
+    return EdgeMerge(merged_keys // num_nodes, merged_keys % num_nodes, merged_weights, np.flatnonzero(in_first & ~in_second),
+                     np.flatnonzero(in_second & ~in_first), second_at[differ], previous[differ], duplicates)
+
+def describe_merge(merge, first_name = 'first list', second_name = 'second list'):
+    ''' One-line summary of an EdgeMerge, eg for printing when a network is built from two sources. '''
+    return (f"{merge.sources.size} connections: {merge.only_first.size} only in {first_name}, {merge.only_second.size} only in {second_name}, "
+            f"{merge.mismatched.size} with different weights, {sum(merge.duplicates)} repeated")
+
+def _fill_positions(rows, next_free):
+    ''' Order that groups a chunk of connections by 'rows', and the position of each (in that order) in CSR arrays whose next free
+    slot for row i is next_free[i]; advances next_free past the chunk. '''
+    order = np.argsort(rows, kind='stable')
+    rows = rows[order]
+    counts = np.bincount(rows, minlength=next_free.size)
+    positions = next_free[rows] + np.arange(rows.size) - (np.cumsum(counts) - counts)[rows]
+    next_free += counts
+    return order, positions
+
+def edgelist_to_graph_store(path, store_path, usernames = None, num_nodes = None, index_dtype = None, weight_dtype = np.float32, chunk_bytes = 1 << 26, replace = True):
+    ''' Converts an edge list in NetworkX format into a graph store at 'store_path' without holding the connections in memory: a first
+    pass over the file counts the connections of every node, and a second pass scatters each chunk into memory-mapped CSR arrays.
+    Memory is O(number of nodes + chunk). The network has len(usernames) nodes (by default num_nodes, or one more than the largest
+    node id, named by their ids). An existing store at 'store_path' is handled as in write_graph_store. '''
+
+    out_degree = np.zeros(0, dtype=np.int64)
+    in_degree = np.zeros(0, dtype=np.int64)
+    for sources, targets, _ in iter_edgelist(path, chunk_bytes):
+        if sources.size == 0:
+            continue
+        size = max(out_degree.size, sources.max()+1, targets.max()+1)
+        out_degree = np.bincount(sources, minlength=size) + np.pad(out_degree, (0, size - out_degree.size))
+        in_degree = np.bincount(targets, minlength=size) + np.pad(in_degree, (0, size - in_degree.size))
+    if usernames is None:
+        usernames = [str(i) for i in range(max(out_degree.size, num_nodes or 0))]
+    N = len(usernames)
+    if out_degree.size > N:
+        raise ValueError(f"{path} has connections to node {out_degree.size-1} but the network has {N} nodes")
+    if index_dtype is None:
+        index_dtype = np.int32 if N < 2**31 else np.int64
+
+    staging = _stage_store(store_path)
+    E = int(out_degree.sum())
+    arrays = {}
+    for direction, degree in (('out', out_degree), ('in', in_degree)):
+        indptr = np.zeros(N+1, dtype=np.int64)
+        np.cumsum(degree, out=indptr[1:degree.size+1])
+        indptr[degree.size+1:] = E
+        np.save(os.path.join(staging, direction + '_indptr.npy'), indptr)
+        arrays[direction] = (indptr[:-1].copy(),
+                             np.lib.format.open_memmap(os.path.join(staging, direction + '_indices.npy'), mode='w+', dtype=index_dtype, shape=(E,)),
+                             np.lib.format.open_memmap(os.path.join(staging, direction + '_weights.npy'), mode='w+', dtype=weight_dtype, shape=(E,)))
+    for sources, targets, weights in iter_edgelist(path, chunk_bytes):
+        for direction, rows, cols in (('out', sources, targets), ('in', targets, sources)):
+            next_free, indices, weights_out = arrays[direction]
+            order, positions = _fill_positions(rows, next_free)
+            indices[positions] = cols[order]
+            weights_out[positions] = weights[order]
+    for _, indices, weights_out in arrays.values():
+        indices.flush()
+        weights_out.flush()
+    del arrays
+    _finish_store(staging, store_path, list(usernames), E, index_dtype, weight_dtype, replace)
+
+def load_edgelist(path = 'congress.edgelist', usernames = None, cache_dir = '.graph_cache', chunk_bytes = 1 << 26):
+    ''' Loads an edge list in NetworkX format as a CSRGraph, like load_graph does for the JSON adjacency: the first load streams the
+    file into a graph store (float64 weights) in cache_dir/v<store version>-<SHA-256 of the file and the usernames>/, and later loads memory-map it.
+    Nodes are named by their ids unless 'usernames' is given. Pass cache_dir = None to read the file into memory without caching. '''
+
+    if cache_dir is None:
+        sources, targets, weights = read_edgelist(path, chunk_bytes)
+        if usernames is None:
+            usernames = [str(i) for i in range(max(sources.max(initial=-1), targets.max(initial=-1)) + 1)]
+        return graph_from_edges(sources, targets, weights, usernames)
+
+    key = _file_hash(path)
+    if usernames is not None:
+        key = hashlib.sha256((key + '\n' + '\n'.join(usernames)).encode('utf-8')).hexdigest()
+    cache = os.path.join(cache_dir, f'v{STORE_VERSION}-' + key)
+    if not os.path.isdir(cache):
+        edgelist_to_graph_store(path, cache, usernames, weight_dtype=np.float64, chunk_bytes=chunk_bytes, replace=False)
+    return open_graph_store(cache)
+
+def to_networkx(graph, label = 'label'):
+    ''' NetworkX DiGraph of a CSRGraph, with nodes 0..N-1 carrying their username in the node attribute 'label'
+    and edges carrying 'weight'. '''
+
+    G = nx.DiGraph()
+    G.add_nodes_from((i, {label: username}) for i, username in enumerate(np.asarray(graph.usernames).tolist()))
+    sources, targets, weights = graph_edges(graph)
+    G.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(), weights.tolist()))
+    return G
@@ -5,23 +5,14 @@ Created on Fri Aug  4 10:41:58 2023
 @author: finkt
 """
 
-import json
 import numpy as np
 from matplotlib import pyplot as plt
 from scipy.stats import lognorm
+from graph_loader import load_graph
 
-f = open('congress_network_data.json')
-data = json.load(f)
+graph = load_graph('congress_network_data.json')
 
-inList = data[0]['inList']
-inWeight = data[0]['inWeight']
-outList = data[0]['outList']
-outWeight = data[0]['outWeight']
-usernameList = data[0]['usernameList']
-
-all_weights = []
-for single_node_weights in outWeight:
-    all_weights.extend(single_node_weights)
+all_weights = np.asarray(graph.out_weights)
 
 n, bins, patches = plt.hist(all_weights, bins=100, density=True)
 
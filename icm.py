@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""icm.py
+Monte Carlo simulation of the Independent Cascade Model (ICM) on weighted,
+directed networks, used as the ground truth for spread in analyze_influence.py.
+Networks are given as outgoing connections in CSR form, as returned by
+viral_centrality.adjacency_to_csr(outList, outWeight).
+"""
+import numpy as np
+from scipy import sparse, stats
+from scipy.sparse import csgraph
+from csr import gather_ranges, shared_array_pool, worker_state
+
+def cascade_step(indptr, indices, weights, cascades, nodes, activated, rng):
+    ''' One step of many independent cascades run side by side on the connections in CSR form. (cascades[i], nodes[i]) are the
+    (cascade, node) pairs activated on the previous step, and activated[c, n] records whether node n has been activated in cascade c.
+    Each outgoing connection of a newly activated node is tried once, with one uniform draw per try. Marks the newly activated pairs
+    in 'activated' and returns them, sorted by cascade and node. Also used to grow RR sets backwards along incoming connections (ris.py). '''
+    N = activated.shape[1]
+    positions, _ = gather_ranges(indptr, nodes)
+    tries = np.repeat(np.arange(nodes.size), indptr[nodes+1] - indptr[nodes]) #(cascade, node) pair making each try
+    success = rng.random(positions.size) < weights[positions]
+    hit_cascades = cascades[tries[success]]
+    hit_nodes = indices[positions[success]]
+    fresh = ~activated[hit_cascades, hit_nodes]
+    keys = np.unique(hit_cascades[fresh] * N + hit_nodes[fresh])
+    cascades, nodes = keys // N, keys % N
+    activated[cascades, nodes] = True
+    return cascades, nodes
+
+def _cascade_sizes(indptr, indices, weights, seed, num_cascades, rng):
+    ''' Runs 'num_cascades' independent cascades from 'seed' side by side and returns the number of activated nodes (including the seed) in each.
+    Every step, all (cascade, node) pairs activated on the previous step try their outgoing connections at once (see cascade_step).
+    As in run_icm_simulation, every connection gets exactly one chance, and only when its source has just been activated. '''
+
+    N = len(indptr)-1
+    activated = np.zeros((num_cascades, N), dtype=bool)
+    activated[:, seed] = True
+    cascades = np.arange(num_cascades) #cascade of each newly activated (cascade, node) pair
+    nodes = np.full(num_cascades, seed)
+
+    while cascades.size > 0:
+        cascades, nodes = cascade_step(indptr, indices, weights, cascades, nodes, activated, rng)
+
+    return activated.sum(axis=1)
+
+def _worker_block(seed, num_cascades, seed_seq):
+    rng = np.random.default_rng(seed_seq)
+    return int(_cascade_sizes(worker_state['indptr'], worker_state['indices'], worker_state['weights'], seed, num_cascades, rng).sum())
+
+def icm_spread(indptr, indices, weights, num_simulations = 10000, seeds = None, random_seed = None, batch_size = 1000, workers = None):
+    ''' Average number of activated nodes (including the seed) over 'num_simulations' ICM cascades from each seed node
+    (every node if 'seeds' is None). Cascades are run in blocks of 'batch_size', so memory stays at about batch_size x N booleans.
+    Every (node, block) pair draws from its own random stream, spawned from np.random.SeedSequence(random_seed), so the result for
+    a given 'random_seed' does not depend on the order in which blocks are run. If 'workers' is greater than 1, the blocks are spread
+    over a pool of that many processes (which memory-map the CSR arrays from a temporary directory), and the result is bit-identical
+    to the serial run. '''
+
+    N = len(indptr)-1
+    seeds = np.arange(N) if seeds is None else np.asarray(seeds)
+    indices = np.asarray(indices)
+    weights = np.asarray(weights, dtype=float)
+    block_sizes = [min(batch_size, num_simulations - start) for start in range(0, num_simulations, batch_size)]
+    node_seqs = np.random.SeedSequence(random_seed).spawn(N) #one stream family per node, so a node's result does not depend on 'seeds'
+    tasks = [(seed, num_cascades, block_seq) for seed in seeds for num_cascades, block_seq in zip(block_sizes, node_seqs[seed].spawn(len(block_sizes)))]
+
+    if workers is None or workers <= 1:
+        totals = [int(_cascade_sizes(indptr, indices, weights, seed, num_cascades, np.random.default_rng(block_seq)).sum()) for seed, num_cascades, block_seq in tasks]
+    else:
+        with shared_array_pool(workers, {'indptr': indptr, 'indices': indices, 'weights': weights}) as pool:
+            totals = list(pool.map(_worker_block, *zip(*tasks), chunksize=max(1, len(tasks) // (4*workers))))
+
+    totals = np.array(totals).reshape(seeds.size, len(block_sizes))
+    return totals.sum(axis=1) / num_simulations
+
+def icm_spread_adaptive(indptr, indices, weights, half_width = 0.01, confidence = 0.95, max_simulations = 10000, min_simulations = 200, batch_size = 100, top_k = None, seeds = None, random_seed = None):
+    ''' Like icm_spread, but each seed node only gets as many cascades as it needs. Cascades are run in blocks of 'batch_size';
+    after each block the running mean and variance of every seed's spread (merged block by block with Chan's pairwise update) give a
+    normal-approximation confidence interval, and a seed stops once it has had at least 'min_simulations' cascades and the interval's
+    half-width is at most 'half_width' (or once it reaches 'max_simulations'). If 'top_k' is given, a seed also stops as soon as it is
+    statistically separated from the top-k boundary: a seed in the current top k whose lower bound exceeds the upper bound of every seed
+    outside it, or a seed outside the top k whose upper bound is below the lower bound of every seed in it. A stopped seed stays stopped.
+    Each (node, block) pair draws from its own stream spawned from np.random.SeedSequence(random_seed), so runs can be reproduced.
+    Returns the average spread, the confidence half-width and the number of cascades used, for each seed. '''
+
+    N = len(indptr)-1
+    seeds = np.arange(N) if seeds is None else np.asarray(seeds)
+    indices = np.asarray(indices)
+    weights = np.asarray(weights, dtype=float)
+    z = stats.norm.ppf((1 + confidence) / 2)
+    node_seqs = np.random.SeedSequence(random_seed).spawn(N)
+
+    counts = np.zeros(seeds.size, dtype=np.int64)
+    mean = np.zeros(seeds.size)
+    m2 = np.zeros(seeds.size) #running sum of squared deviations from the mean
+    half = np.full(seeds.size, np.inf)
+    active = np.ones(seeds.size, dtype=bool)
+
+    while np.any(active):
+        for k in np.flatnonzero(active):
+            num_cascades = min(batch_size, max_simulations - counts[k])
+            sizes = _cascade_sizes(indptr, indices, weights, seeds[k], num_cascades, np.random.default_rng(node_seqs[seeds[k]].spawn(1)[0]))
+            #merge the block's mean and sum of squared deviations into the running ones (Chan, Golub and LeVeque, 1979)
+            block_mean = sizes.mean()
+            delta = block_mean - mean[k]
+            total = counts[k] + num_cascades
+            m2[k] += np.square(sizes - block_mean).sum() + delta**2 * counts[k] * num_cascades / total
+            mean[k] += delta * num_cascades / total
+            counts[k] = total
+
+        variance = m2 / np.maximum(counts - 1, 1)
+        half = z * np.sqrt(variance / counts)
+
+        done = (counts >= max_simulations) | ((counts >= min_simulations) & (half <= half_width))
+        if top_k is not None and 0 < top_k < seeds.size:
+            order = np.argsort(-mean, kind='stable')
+            top, rest = order[:top_k], order[top_k:]
+            lower, upper = mean - half, mean + half
+            separated = np.zeros(seeds.size, dtype=bool)
+            separated[top] = lower[top] > upper[rest].max()
+            separated[rest] = upper[rest] < lower[top].min()
+            done |= (counts >= min_simulations) & separated
+        active &= ~done #a seed that has stopped never resumes
+
+    return mean, half, counts
+
+def _condensation_levels(num_components, comp_sources, comp_targets):
+    ''' Level of every component of a condensation DAG, counted from the sinks: 0 for components with no outgoing connections,
+    otherwise one more than the highest level among their successors. Computed by repeatedly peeling off the current sinks. '''
+    levels = np.zeros(num_components, dtype=np.int64)
+    out_degree = np.bincount(comp_sources, minlength=num_components)
+    in_indptr = np.zeros(num_components+1, dtype=np.int64)
+    np.cumsum(np.bincount(comp_targets, minlength=num_components), out=in_indptr[1:])
+    in_sources = comp_sources[np.argsort(comp_targets, kind='stable')]
+    sinks = np.flatnonzero(out_degree == 0)
+    level = 0
+    while sinks.size > 0:
+        levels[sinks] = level
+        positions, _ = gather_ranges(in_indptr, sinks)
+        predecessors = in_sources[positions]
+        out_degree -= np.bincount(predecessors, minlength=num_components)
+        sinks = np.unique(predecessors[out_degree[predecessors] == 0])
+        level += 1
+    return levels
+
+def _reach_counts(N, labels, num_components, comp_sources, comp_targets, block_nodes):
+    ''' Number of nodes reachable from each component of a condensation DAG (including its own nodes). Reachable sets are kept as
+    bitsets over 'block_nodes' target nodes at a time, and combined level by level from the sinks up. '''
+    levels = _condensation_levels(num_components, comp_sources, comp_targets)
+    order = np.argsort(levels[comp_sources], kind='stable')
+    comp_sources, comp_targets = comp_sources[order], comp_targets[order]
+    level_starts = np.searchsorted(levels[comp_sources], np.arange(levels.max()+2))
+
+    counts = np.zeros(num_components, dtype=np.int64)
+    for block_start in range(0, N, block_nodes):
+        block = np.arange(block_start, min(block_start+block_nodes, N))
+        reach = np.zeros((num_components, (block.size + 63) // 64), dtype=np.uint64)
+        offsets = block - block_start
+        np.bitwise_or.at(reach, (labels[block], offsets // 64), np.left_shift(np.uint64(1), (offsets % 64).astype(np.uint64)))
+        for level in range(1, levels.max()+1):
+            lo, hi = level_starts[level], level_starts[level+1]
+            np.bitwise_or.at(reach, comp_sources[lo:hi], reach[comp_targets[lo:hi]])
+        counts += np.bitwise_count(reach).sum(axis=1, dtype=np.int64)
+    return counts
+
+def icm_spread_live_edge(indptr, indices, weights, num_samples = 1000, random_seed = None, block_nodes = 4096):
+    ''' Expected ICM spread (including the seed) of every node at once, from 'num_samples' random live-edge graphs.
+    In a live-edge graph each connection is kept independently with its transmission probability, and the nodes activated by a
+    cascade from a seed are exactly the nodes it can reach, so the spread of every seed is averaged over the same samples instead of
+    drawing separate cascades per seed. Each sample is condensed into its strongly connected components (which share the same
+    reachable set), and reachable-set sizes are counted with bitsets over the condensation DAG, 'block_nodes' target nodes at a time
+    to bound memory. Each sample draws from its own stream spawned from np.random.SeedSequence(random_seed). '''
+
+    N = len(indptr)-1
+    indices = np.asarray(indices)
+    weights = np.asarray(weights, dtype=float)
+    sources = np.repeat(np.arange(N), np.diff(indptr))
+
+    total_spread = np.zeros(N)
+    for sample_seq in np.random.SeedSequence(random_seed).spawn(num_samples):
+        live = np.random.default_rng(sample_seq).random(weights.size) < weights
+        live_sources, live_targets = sources[live], indices[live]
+        live_graph = sparse.csr_matrix((np.ones(live_sources.size), (live_sources, live_targets)), shape=(N, N))
+        num_components, labels = csgraph.connected_components(live_graph, directed=True, connection='strong')
+        labels = labels.astype(np.int64) #int32 keys below would overflow past 46,340 components
+        keys = np.unique(labels[live_sources] * num_components + labels[live_targets])
+        comp_sources, comp_targets = keys // num_components, keys % num_components
+        between = comp_sources != comp_targets
+        counts = _reach_counts(N, labels, num_components, comp_sources[between], comp_targets[between], block_nodes)
+        total_spread += counts[labels]
+
+    return total_spread / num_samples
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""node_attributes.py
+Loads per-member metadata (party, chamber, state) from the sidecar table
+congress_members.csv, with one row per node:
+    node,username,party,chamber,state
+where node is the node id in congress_network_data.json. party is Democratic,
+Republican or Independent, chamber is Senate or House, and state is the
+two-letter state code (left blank where it is not known). The columns are
+loaded as pandas categoricals, so each is stored as small integer codes and
+party-based selections are mask operations over all nodes at once.
+Used by analyze_subnetworks.py and homophily_polarization.py
+"""
+import numpy as np
+import pandas as pd
+
+ATTRIBUTES = ['party', 'chamber', 'state']
+
+def load_node_attributes(path = 'congress_members.csv', usernames = None):
+    ''' Table of node attributes indexed by node id, with categorical columns 'party', 'chamber' and 'state' (blank or missing
+    values are 'Unknown'; their integer codes are in eg table['party'].cat.codes). If 'usernames' (usernameList) is given, the table
+    is aligned to nodes 0..len(usernames)-1, nodes without a row get 'Unknown', and a row whose username does not match the network
+    raises a ValueError. '''
+
+    table = pd.read_csv(path, index_col='node', dtype=str, keep_default_na=False)
+    table.index = table.index.astype(np.int64)
+    if usernames is not None:
+        usernames = np.asarray(usernames)
+        table = table.reindex(np.arange(len(usernames)))
+        mismatched = table['username'].notna() & (table['username'] != usernames)
+        if mismatched.any():
+            node = mismatched.idxmax()
+            raise ValueError(f"{path}: node {node} is {table.at[node, 'username']} but the network has {usernames[node]}")
+        table['username'] = usernames
+    for column in ATTRIBUTES:
+        table[column] = pd.Categorical(table[column].fillna('').replace('', 'Unknown'))
+    return table
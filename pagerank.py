@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""pagerank.py
+Weighted PageRank on weighted, directed networks by sparse power iteration,
+and personalized PageRank (batched, or by local push for a single source).
+Used by analyze_influence.py
+"""
+import numpy as np
+from scipy import sparse
+from csr import gather_ranges
+
+def _transition_matrix(indptr, indices, weights):
+    ''' Transposed transition matrix P^T (so that P^T @ pr spreads every node's rank over its outgoing connections in proportion
+    to their weights) from outgoing connections in CSR form, and the mask of dangling nodes (zero total outgoing weight). '''
+    N = len(indptr)-1
+    weights = np.asarray(weights, dtype=float)
+    adjacency = sparse.csr_matrix((weights, np.asarray(indices), np.asarray(indptr)), shape=(N, N))
+    out_strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_strength == 0
+    scale = np.divide(1.0, out_strength, out=np.zeros(N), where=~dangling)
+    return (sparse.diags(scale) @ adjacency).T.tocsr(), dangling
+
+def pagerank_csr(indptr, indices, weights, alpha = 0.85, max_iter = 100, tol = 1.0e-6, pr0 = None):
+    ''' Weighted PageRank from outgoing connections in CSR form, as returned by viral_centrality.adjacency_to_csr(outList, outWeight).
+    Each iteration is one sparse product with the transposed transition matrix; the rank of dangling nodes (zero total outgoing weight)
+    is spread uniformly over all nodes as a single rank-one correction. Iterates until the L1 change is below 'tol' or for 'max_iter'
+    iterations. 'pr0' warm-starts the iteration from a previous rank vector (eg before a small update of the weights); by default
+    every node starts at 1/N. '''
+
+    N = len(indptr)-1
+    if N == 0:
+        return np.zeros(0)
+    transition_T, dangling = _transition_matrix(indptr, indices, weights)
+    pr = np.full(N, 1.0 / N) if pr0 is None else np.array(pr0, dtype=float)
+
+    for _ in range(max_iter):
+        prev_pr = pr
+        pr = alpha * (transition_T @ prev_pr) + (alpha * prev_pr[dangling].sum() + (1.0 - alpha)) / N
+        if np.abs(pr - prev_pr).sum() < tol:
+            break
+
+    return pr
+
+def weighted_pagerank_centrality(G, alpha = 0.85, max_iter = 100, tol = 1.0e-6, pr0 = None):
+    ''' Weighted PageRank of a NetworkX DiGraph with 'weight' edge attributes (missing weights count as 0), as a dict keyed by node.
+    'pr0' is an optional dict of starting values keyed by node. See pagerank_csr. '''
+
+    nodes = list(G.nodes())
+    if not nodes:
+        return {}
+    position = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(position[u], position[v], w) for u, v, w in G.edges(data='weight', default=0.0)], dtype=float).reshape(-1, 3)
+    sources = edges[:, 0].astype(np.int64)
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(len(nodes)+1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(nodes)), out=indptr[1:])
+    start = None if pr0 is None else [pr0[node] for node in nodes]
+    pr = pagerank_csr(indptr, edges[order, 1].astype(np.int64), edges[order, 2], alpha = alpha, max_iter = max_iter, tol = tol, pr0 = start)
+    return dict(zip(nodes, pr))
+
+def personalized_pagerank_csr(indptr, indices, weights, teleport, alpha = 0.85, max_iter = 100, tol = 1.0e-6):
+    ''' Personalized weighted PageRank for many teleport vectors at once. 'teleport' is an N x K array whose columns are the
+    teleport distributions (eg the indicator of one party, one chamber or one member; each column is normalized to sum to one).
+    All K rank vectors are iterated together as one sparse matrix - dense matrix product per iteration; the rank of dangling nodes
+    is sent back to each column's teleport distribution. Iterates until every column's L1 change is below 'tol' or for 'max_iter'
+    iterations. Returns an N x K array. '''
+
+    N = len(indptr)-1
+    teleport = np.array(teleport, dtype=float).reshape(N, -1)
+    teleport /= teleport.sum(axis=0)
+    transition_T, dangling = _transition_matrix(indptr, indices, weights)
+    pr = teleport.copy()
+
+    for _ in range(max_iter):
+        prev_pr = pr
+        pr = alpha * (transition_T @ prev_pr) + teleport * (alpha * prev_pr[dangling].sum(axis=0) + (1.0 - alpha))
+        if np.abs(pr - prev_pr).sum(axis=0).max() < tol:
+            break
+
+    return pr
+
+def personalized_pagerank_push(indptr, indices, weights, source, alpha = 0.85, eps = 1.0e-6, out_strength = None):
+    ''' Approximate personalized PageRank for the single teleport node 'source' by forward push (Andersen, Chung and Lang, 2006).
+    Rank is only pushed from nodes whose residual is at least 'eps', so the work depends on the neighbourhood of 'source' rather than
+    on the size of the network. All nodes above the threshold push together in each round, as one gather over their outgoing
+    connections, and only the residuals of the nodes they reach are updated and checked for the next round. Pass the nodes' total
+    outgoing weights as 'out_strength' to avoid recomputing them on every query.
+    Returns the approximate rank vector and the leftover residual, which is its L1 distance from the result of personalized_pagerank_csr
+    (converged) with teleport vector e_source. '''
+
+    N = len(indptr)-1
+    indices = np.asarray(indices)
+    weights = np.asarray(weights, dtype=float)
+    if out_strength is None:
+        out_strength = np.bincount(np.repeat(np.arange(N), np.diff(indptr)), weights=weights, minlength=N)
+    pr = np.zeros(N)
+    residual = np.zeros(N)
+    residual[source] = 1.0
+    active = np.array([source])
+
+    while active.size > 0:
+        mass = residual[active]
+        residual[active] = 0.0
+        pr[active] += (1.0 - alpha) * mass
+        positions, _ = gather_ranges(indptr, active)
+        shares = alpha * np.repeat(mass / np.where(out_strength[active] > 0, out_strength[active], 1.0), indptr[active+1] - indptr[active]) * weights[positions]
+        touched, slots = np.unique(np.append(indices[positions], source), return_inverse=True) #only these residuals change
+        residual[touched] += np.bincount(slots[:-1], weights=shares, minlength=touched.size)
+        residual[source] += alpha * mass[out_strength[active] == 0].sum() #dangling: rank goes back to the source, as in personalized_pagerank_csr
+        active = touched[residual[touched] >= eps]
+
+    return pr, residual.sum()
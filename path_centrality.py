@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""path_centrality.py
+Probabilistic betweenness and closeness centrality on weighted, directed
+networks. The length of a path is -log of the product of its transmission
+probabilities, so shortest paths are the most probable transmission chains.
+Both measures run on one binary-heap Dijkstra (dijkstra_paths) over -log(weight) arrays.
+Used by analyze_influence.py
+"""
+import heapq
+import math
+import numpy as np
+from csr import shared_array_pool, worker_state
+
+def neg_log_csr(G):
+    ''' Outgoing connections of a NetworkX DiGraph in CSR form (as Python lists, which are faster than arrays for the scalar work
+    in dijkstra_paths), with lengths -log(weight); connections with weight <= 0 get infinite length. Successors keep the order of
+    G.successors. Returns the list of nodes (position i in the arrays is nodes[i]), indptr, indices and lengths. '''
+    nodes = list(G.nodes())
+    position = {node: i for i, node in enumerate(nodes)}
+    indptr = [0]
+    indices = []
+    lengths = []
+    for u in nodes:
+        for v in G.successors(u):
+            w = G[u][v]['weight']
+            indices.append(position[v])
+            lengths.append(-math.log(w) if w > 0 else float('inf'))
+        indptr.append(len(indices))
+    return nodes, indptr, indices, lengths
+
+def dijkstra_paths(indptr, indices, lengths, source, rtol = 1e-12):
+    ''' Single-source shortest paths with a binary heap, keeping every shortest path: two path lengths within a relative
+    tolerance 'rtol' of each other count as equal (sums of -log weights along different paths rarely agree to the last bit).
+    Returns the reachable nodes in the order they were settled (non-decreasing distance), the list of shortest-path predecessors
+    of every node, the number of shortest paths from the source to every node, and the distances (inf if unreachable). '''
+    N = len(indptr)-1
+    inf = float('inf')
+    dist = [inf] * N
+    predecessors = [[] for _ in range(N)]
+    sigma = [0] * N
+    settled = [False] * N
+    order = []
+    dist[source] = 0
+    sigma[source] = 1
+    heap = [(0, source)]
+    while heap:
+        d, current = heapq.heappop(heap)
+        if settled[current]:
+            continue #stale entry
+        settled[current] = True
+        order.append(current)
+        for e in range(indptr[current], indptr[current+1]):
+            nbr = indices[e]
+            if settled[nbr]:
+                continue
+            cost = d + lengths[e]
+            if cost == inf:
+                continue
+            slack = rtol * dist[nbr] if dist[nbr] < inf else 0.0
+            if cost < dist[nbr] - slack: #strictly shorter: forget the paths found so far
+                dist[nbr] = cost
+                predecessors[nbr] = [current]
+                sigma[nbr] = sigma[current]
+                heapq.heappush(heap, (cost, nbr))
+            elif cost <= dist[nbr] + slack: #equally short: one more way to get there
+                predecessors[nbr].append(current)
+                sigma[nbr] += sigma[current]
+    return order, predecessors, sigma, dist
+
+def _accumulate_source(betweenness, indptr, indices, lengths, s, endpoints, rtol):
+    ''' Adds the dependencies of source s to 'betweenness': one Dijkstra run and one backward sweep over the settled nodes. '''
+    order, predecessors, sigma, _ = dijkstra_paths(indptr, indices, lengths, s, rtol)
+    delta = [0.0] * len(betweenness)
+    if endpoints:
+        betweenness[s] += len(order) - 1
+    for w in reversed(order): #backward sweep: nodes in order of non-increasing distance
+        coeff = (1 + delta[w]) / sigma[w]
+        for v in predecessors[w]:
+            delta[v] += sigma[v] * coeff
+        if w != s:
+            betweenness[w] += delta[w] + 1 if endpoints else delta[w]
+
+def prob_betweenness_centrality(G, endpoints = True, rtol = 1e-12):
+    ''' Probabilistic betweenness by Brandes' dependency accumulation (Brandes, 2001) over -log(weight) path lengths: for every
+    pair (s, t) with t reachable from s, each node on a shortest path from s to t is credited with the fraction of the shortest
+    paths from s to t that pass through it. Each source takes one Dijkstra run and one backward sweep over the settled nodes.
+    With endpoints = True, s and t are credited as well (with one each), which is the counting convention of the original
+    path-walking implementation and reproduces it exactly when shortest paths are unique. With endpoints = False only the nodes
+    strictly between s and t are credited, the usual definition of betweenness. Returns a dict keyed by node, in node order. '''
+    nodes, indptr, indices, lengths = neg_log_csr(G)
+    N = len(nodes)
+    betweenness = [0.0] * N
+    for s in range(N):
+        _accumulate_source(betweenness, indptr, indices, lengths, s, endpoints, rtol)
+    return {nodes[i]: betweenness[i] for i in range(N)}
+
+def _worker_setup(indptr, indices, lengths):
+    ''' Per-worker copy of the memory-mapped -log(weight) CSR arrays as Python lists, as neg_log_csr returns them. '''
+    return {'csr': (indptr.tolist(), indices.tolist(), lengths.tolist())}
+
+def _worker_sources(sources, endpoints, rtol):
+    indptr, indices, lengths = worker_state['csr']
+    betweenness = [0.0] * (len(indptr)-1)
+    for s in sources:
+        _accumulate_source(betweenness, indptr, indices, lengths, s, endpoints, rtol)
+    return betweenness
+
+def approx_prob_betweenness_centrality(G, epsilon = 0.05, delta = 0.1, endpoints = True, rtol = 1e-12, random_seed = None, workers = None, chunk_size = 64):
+    ''' Estimates prob_betweenness_centrality from a uniform sample of source nodes (with replacement), scaling the sampled
+    dependencies by N / (number of samples). Every source adds at most N - 1 to any node, so by Hoeffding's inequality and a union
+    bound over the N nodes, ceil(ln(2N/delta) / (2 epsilon^2)) samples estimate every node's betweenness to within epsilon*N*(N-1)
+    with probability at least 1 - delta. If that is at least N samples, the exact value is computed instead.
+    Sources are processed 'chunk_size' at a time, in a pool of 'workers' processes if workers is greater than 1; the chunks and
+    the order they are summed in do not depend on the number of workers, so neither does the result.
+    Returns the dict of estimates (keyed by node, in node order) and the achieved epsilon for the number of samples used
+    (0 for the exact computation). '''
+    nodes, indptr, indices, lengths = neg_log_csr(G)
+    N = len(nodes)
+    if N < 2:
+        return {node: 0.0 for node in nodes}, 0.0
+    num_samples = math.ceil(math.log(2 * N / delta) / (2 * epsilon**2))
+    if num_samples >= N:
+        sources, scale, achieved = list(range(N)), 1.0, 0.0
+    else:
+        sources = np.random.default_rng(random_seed).integers(0, N, num_samples).tolist()
+        scale, achieved = N / num_samples, math.sqrt(math.log(2 * N / delta) / (2 * num_samples))
+
+    chunks = [sources[start:start+chunk_size] for start in range(0, len(sources), chunk_size)]
+    if workers is None or workers <= 1:
+        partials = []
+        for chunk in chunks:
+            partial = [0.0] * N
+            for s in chunk:
+                _accumulate_source(partial, indptr, indices, lengths, s, endpoints, rtol)
+            partials.append(partial)
+    else:
+        with shared_array_pool(workers, {'indptr': indptr, 'indices': indices, 'lengths': lengths}, _worker_setup) as pool:
+            partials = list(pool.map(_worker_sources, chunks, [endpoints] * len(chunks), [rtol] * len(chunks)))
+
+    betweenness = [0.0] * N
+    for partial in partials:
+        for i in range(N):
+            betweenness[i] += partial[i]
+    return {nodes[i]: scale * betweenness[i] for i in range(N)}, achieved
+
+def prob_closeness_centrality(G):
+    ''' (N - 1) divided by the total length of the most probable paths from a node to every node it can reach (0 if it reaches none). '''
+    nodes, indptr, indices, lengths = neg_log_csr(G)
+    N = len(nodes)
+    closeness = {}
+    for s in range(N):
+        dist = dijkstra_paths(indptr, indices, lengths, s)[3]
+        total = sum(x for x in dist if x < float('inf'))
+        if total > 0 and total < float('inf'):
+            closeness[nodes[s]] = (N - 1) / total
+        else:
+            closeness[nodes[s]] = 0.0
+    return closeness
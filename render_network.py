@@ -1,34 +1,14 @@
-import json
 import networkx as nx
 import matplotlib.pyplot as plt
+from graph_loader import load_graph, read_edgelist, graph_edges, graph_from_edges, merge_edges, describe_merge, to_networkx
 
-with open('congress_network_data.json', 'r') as f:
-    data = json.load(f)
-
-inList = data['inList']
-inWeight = data['inWeight']
-outList = data['outList']
-outWeight = data['outWeight']
-usernameList = data['usernameList']
-
-G = nx.DiGraph()
-
-for i, username in enumerate(usernameList):
-    G.add_node(i, label=username)
-
-for i, out_nodes in enumerate(outList):
-    for j, target in enumerate(out_nodes):
-        G.add_edge(i, target, weight=outWeight[i][j])
-
-# Manually parse  edge list file and add edges to the graph
-with open('congress.edgelist', 'r') as f:
-    for line in f:
-        parts = line.strip().split()
-        if len(parts) == 3:
-            source = int(parts[0])
-            target = int(parts[1])
-            weight = float(parts[2].split(':')[1].strip('}'))
-            G.add_edge(source, target, weight=weight)
+graph = load_graph('congress_network_data.json')
+
+# Connections of the JSON adjacency and the edge list file, merged once (edge list weights win)
+merge = merge_edges(graph_edges(graph), read_edgelist('congress.edgelist'), len(graph.usernames))
+print(describe_merge(merge, 'congress_network_data.json', 'congress.edgelist'))
+
+G = to_networkx(graph_from_edges(merge.sources, merge.targets, merge.weights, graph.usernames))
 
 pos = nx.spring_layout(G)  # Position nodes using Fruchterman-Reingold force-directed algorithm
 plt.figure(figsize=(12, 12))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""ris.py
+Reverse-reachable-set (RIS) influence estimation and IMM seed-set selection
+under the Independent Cascade Model (Borgs et al., SODA 2014; Tang, Shi and
+Xiao, SIGMOD 2015). Networks are given as outgoing connections in CSR form, as
+returned by viral_centrality.adjacency_to_csr(outList, outWeight).
+
+A reverse-reachable (RR) set is the set of nodes that reach a uniformly random
+root node in a random live-edge graph. The probability that a seed set hits an
+RR set is its expected spread divided by N, so one collection of RR sets gives
+spread estimates for every seed set at once.
+"""
+import math
+import numpy as np
+from icm import cascade_step
+from csr import gather_ranges, out_edge_order
+
+def reverse_csr(indptr, indices, weights):
+    ''' Incoming connections in CSR form from outgoing connections in CSR form (or vice versa). '''
+    rev_indptr, positions, rows = out_edge_order(indptr, indices)
+    return rev_indptr, rows[positions], np.asarray(weights)[positions]
+
+def sample_rr_sets(in_indptr, in_indices, in_weights, num_sets, rng, batch_size = None):
+    ''' Samples 'num_sets' RR sets from the incoming connections in CSR form. Each RR set grows backwards from a random root:
+    every incoming connection of a newly added node is tried once with its transmission probability. RR sets are grown 'batch_size'
+    at a time side by side (by default as many as fit in about 64M booleans of visited flags).
+    Returns the RR sets in CSR form: the nodes of set r are rr_nodes[rr_indptr[r]:rr_indptr[r+1]]. '''
+
+    N = len(in_indptr)-1
+    if batch_size is None:
+        batch_size = max(1, 2**26 // max(N, 1))
+    set_ids = []
+    set_nodes = []
+    for start in range(0, num_sets, batch_size):
+        B = min(batch_size, num_sets - start)
+        visited = np.zeros((B, N), dtype=bool)
+        sets = np.arange(B)
+        nodes = rng.integers(0, N, B)
+        visited[sets, nodes] = True
+        while sets.size > 0:
+            set_ids.append(sets + start)
+            set_nodes.append(nodes)
+            sets, nodes = cascade_step(in_indptr, in_indices, in_weights, sets, nodes, visited, rng)
+
+    set_ids = np.concatenate(set_ids) if set_ids else np.zeros(0, dtype=np.int64)
+    set_nodes = np.concatenate(set_nodes) if set_nodes else np.zeros(0, dtype=np.int64)
+    order = np.argsort(set_ids, kind='stable')
+    rr_indptr = np.zeros(num_sets+1, dtype=np.int64)
+    np.cumsum(np.bincount(set_ids, minlength=num_sets), out=rr_indptr[1:])
+    return rr_indptr, set_nodes[order]
+
+def rr_coverage(rr_indptr, rr_nodes, seed_set):
+    ''' Fraction of the RR sets that contain at least one node of 'seed_set'. '''
+    num_sets = len(rr_indptr)-1
+    if num_sets == 0:
+        return 0.0
+    hit = np.isin(rr_nodes, np.asarray(list(seed_set), dtype=np.int64))
+    set_ids = np.repeat(np.arange(num_sets), np.diff(rr_indptr))
+    return np.unique(set_ids[hit]).size / num_sets
+
+def estimate_spread(indptr, indices, weights, seed_set, num_sets = 100000, random_seed = None):
+    ''' Expected ICM spread of 'seed_set' (including the seeds themselves), estimated from 'num_sets' fresh RR sets. '''
+    N = len(indptr)-1
+    in_indptr, in_indices, in_weights = reverse_csr(indptr, indices, weights)
+    rr_indptr, rr_nodes = sample_rr_sets(in_indptr, in_indices, in_weights, num_sets, np.random.default_rng(random_seed))
+    return N * rr_coverage(rr_indptr, rr_nodes, seed_set)
+
+def greedy_max_coverage(rr_indptr, rr_nodes, N, k):
+    ''' Greedy maximum coverage: picks k nodes one at a time, each covering the most RR sets not yet covered.
+    Returns the chosen nodes and the fraction of RR sets they cover, which is within a factor 1 - 1/e of the best possible. '''
+
+    num_sets = len(rr_indptr)-1
+    gains = np.bincount(rr_nodes, minlength=N) #number of uncovered RR sets containing each node
+    node_indptr = np.zeros(N+1, dtype=np.int64)
+    np.cumsum(gains, out=node_indptr[1:])
+    sets_of_node = np.repeat(np.arange(num_sets), np.diff(rr_indptr))[np.argsort(rr_nodes, kind='stable')] #RR sets containing each node, in CSR form
+    covered = np.zeros(num_sets, dtype=bool)
+    seeds = []
+    for _ in range(min(k, N)):
+        best = int(np.argmax(gains))
+        seeds.append(best)
+        new_sets = sets_of_node[node_indptr[best]:node_indptr[best+1]]
+        new_sets = new_sets[~covered[new_sets]]
+        covered[new_sets] = True
+        positions, _ = gather_ranges(rr_indptr, new_sets)
+        gains -= np.bincount(rr_nodes[positions], minlength=N)
+        gains[best] = -1 #never pick the same node twice
+    return seeds, covered.sum() / max(num_sets, 1)
+
+def imm_seed_set(indptr, indices, weights, k, epsilon = 0.1, ell = 1.0, random_seed = None):
+    ''' IMM (Tang, Shi and Xiao, 2015): a set of k seed nodes whose expected ICM spread is at least (1 - 1/e - epsilon) times the best
+    possible, with probability at least 1 - 1/N**ell. The number of RR sets is chosen by the algorithm: a lower bound on the best spread
+    is found first by testing geometrically decreasing guesses, and then a fresh collection of enough RR sets is drawn for the greedy
+    cover to meet the guarantee. Reusing the RR sets of the first phase would make the final sets depend on the lower bound, which
+    breaks the martingale argument behind the guarantee (Chen, 2018). Returns the seed nodes (in the order they were picked) and the estimated spread of the set. '''
+
+    N = len(indptr)-1
+    k = min(k, N)
+    if N < 2 or k == 0:
+        return list(range(k)), float(k)
+    rng = np.random.default_rng(random_seed)
+    in_indptr, in_indices, in_weights = reverse_csr(indptr, indices, weights)
+    ell = ell * (1 + math.log(2) / math.log(N)) #so that both phases together succeed with probability 1 - 1/N**ell
+    log_binom = math.lgamma(N+1) - math.lgamma(k+1) - math.lgamma(N-k+1)
+
+    eps_prime = math.sqrt(2) * epsilon
+    lambda_prime = (2 + 2/3*eps_prime) * (log_binom + ell*math.log(N) + math.log(max(math.log2(N), 1))) * N / eps_prime**2
+    lower_bound = 1.0
+    rr_indptr, rr_nodes = np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    for i in range(1, max(int(math.log2(N)), 2)):
+        x = N / 2**i
+        rr_indptr, rr_nodes = _extend_rr_sets(rr_indptr, rr_nodes, in_indptr, in_indices, in_weights, math.ceil(lambda_prime / x), rng)
+        seeds, coverage = greedy_max_coverage(rr_indptr, rr_nodes, N, k)
+        if N * coverage >= (1 + eps_prime) * x:
+            lower_bound = N * coverage / (1 + eps_prime)
+            break
+
+    alpha = math.sqrt(ell*math.log(N) + math.log(2))
+    beta = math.sqrt((1 - 1/math.e) * (log_binom + ell*math.log(N) + math.log(2)))
+    lambda_star = 2 * N * ((1 - 1/math.e)*alpha + beta)**2 / epsilon**2
+    rr_indptr, rr_nodes = sample_rr_sets(in_indptr, in_indices, in_weights, math.ceil(lambda_star / lower_bound), rng) #fresh sets, independent of the lower bound (Chen, 2018)
+    seeds, coverage = greedy_max_coverage(rr_indptr, rr_nodes, N, k)
+    return seeds, N * coverage
+
+def _extend_rr_sets(rr_indptr, rr_nodes, in_indptr, in_indices, in_weights, num_sets, rng):
+    ''' Tops up a collection of RR sets in CSR form to 'num_sets' sets. '''
+    missing = num_sets - (len(rr_indptr)-1)
+    if missing <= 0:
+        return rr_indptr, rr_nodes
+    new_indptr, new_nodes = sample_rr_sets(in_indptr, in_indices, in_weights, missing, rng)
+    return np.concatenate((rr_indptr, rr_indptr[-1] + new_indptr[1:])), np.concatenate((rr_nodes, new_nodes))
@@ -7,23 +7,35 @@ Used by compute_vc.py
 @author Christian G. Fink
 @date 6/15/23
 """
+import functools
+import heapq
+import itertools
 import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from csr import gather_ranges, out_edge_order, shared_array_pool, worker_state
+try:
+    import numba #optional; only used to compile the kernel in viral_centrality_compiled
+except ImportError:
+    numba = None
 
-def viral_centrality(inList, inWeight, outList, Niter = 5, beta = 1.0, tol = 0.0001):  
+def viral_centrality(inList, inWeight, outList, Niter = 5, beta = 1.0, tol = 0.0001, seeds = None):  
     ''' User has a choice to either run each simulation until the probabilities have converged within
     a specified relative tolerance, or just iterate for 'Niter' iterations for each seed node. If Niter is less than 1, the former option is selected, and
     if Niter is 1 or greater, the latter option is selected.
     inList[i] is list of all the nodes sending connections to i; inWeight[i] is list of corresponding weights (ie transmission probabilities)
     outList[i] is  a list of all the nodes i sends connections to
-    All transmission probabilities are universally multiplied by 'beta' '''
+    All transmission probabilities are universally multiplied by 'beta'
+    If 'seeds' is given, only those seed nodes are computed (the other entries of the result stay 0), eg for timing on a sample of seeds '''
 
     N=len(inList)
+    seed_nodes = range(N) if seeds is None else seeds
     
     avg_infections = np.zeros(N)
     
     if Niter < 1: #if Niter is less than 1, this means we want to iterate until the uninfected array has converged to within the prescribed relative tolerance
         
-        for seed in range(N):
+        for seed in seed_nodes:
             prev_uninfected = np.ones(N) 
             uninfected = np.ones(N) #probabilty that node hasn't been infected yet. starts at one for each node
             last_infected = np.zeros(N) #probability that node was infected on last timestep
@@ -74,7 +86,7 @@ def viral_centrality(inList, inWeight, outList, Niter = 5, beta = 1.0, tol = 0.0
         
     else: #if Niter is a positive integer, then just iterate for that number of time steps
     
-        for seed in range(N):
+        for seed in seed_nodes:
             prev_uninfected = np.ones(N) 
             uninfected = np.ones(N) #probabilty that node hasn't been infected yet. starts at one for each node
             last_infected = np.zeros(N) #probability that node was infected on last timestep
@@ -124,3 +136,499 @@ def viral_centrality(inList, inWeight, outList, Niter = 5, beta = 1.0, tol = 0.0
             avg_infections[seed] = sum(1 - uninfected) - 1 #dont want to include seed node infection in total
     
     return avg_infections
+
+
+def adjacency_to_csr(adjList, weightList = None):
+    ''' Flattens nested adjacency lists (eg inList/inWeight from congress_network_data.json) into compressed sparse row (CSR) arrays.
+    The neighbours of node i are indices[indptr[i]:indptr[i+1]], with corresponding weights[indptr[i]:indptr[i+1]].
+    weights is None if no weightList is given. '''
+
+    lengths = np.fromiter((len(neighbs) for neighbs in adjList), dtype=np.int64, count=len(adjList))
+    indptr = np.zeros(len(adjList)+1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter(itertools.chain.from_iterable(adjList), dtype=np.int64, count=indptr[-1])
+    if weightList is None:
+        return indptr, indices, None
+    weights = np.fromiter(itertools.chain.from_iterable(weightList), dtype=float, count=indptr[-1])
+    return indptr, indices, weights
+
+def _in_edge_summer(indptr):
+    ''' Sparse N x E matrix S with S[i,e] = 1 if e is an incoming connection of node i, so that S @ x sums
+    a per-connection quantity x over the incoming connections of every node. '''
+    N = len(indptr)-1
+    E = int(indptr[-1])
+    return sparse.csr_matrix((np.ones(E), np.arange(E), indptr), shape=(N, E))
+
+def _max_relative_change(prev_uninfected, uninfected):
+    ''' Largest relative decrease of the uninfected probabilities over one timestep (the convergence criterion of viral_centrality),
+    taken separately for each column of N x B state arrays. Nodes whose uninfected probability was already zero (eg the seed node)
+    are skipped, just as np.nanmax skips them in viral_centrality. '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rel_change = (prev_uninfected - uninfected) / prev_uninfected
+    rel_change[prev_uninfected <= 0] = 0
+    return rel_change.max(axis=0)
+
+def _run_block(edge_order, indices, beta_weights, initial, Niter, tol, column_betas = None, threshold = 0.0):
+    ''' Advances a block of B independent spreading processes together as N x B state matrices.
+    initial[:,b] is 1 for the node(s) infected at t=0 in process b and 0 elsewhere. In tolerance mode (Niter < 1) each column
+    stops on its own as soon as it meets the relative tolerance, and is dropped from the block for the remaining timesteps.
+    If column_betas is given, the weights of process b are additionally multiplied by column_betas[b].
+    Each timestep only visits the connections sent by nodes with nonzero last_infected in some column (found through 'edge_order',
+    the output of out_edge_order), and only updates the nodes they reach: every other node has cur_infected = 0 on that timestep.
+    The visited connections are summed in incoming CSR order, so the result is the same as summing over all connections.
+    A positive 'threshold' also drops the spread from every node whose last_infected in a column is at most 'threshold' on that
+    timestep, so only the connections of nodes above it are visited (see viral_centrality_frontier).
+    Returns the N x B matrix of final uninfected probabilities. '''
+
+    N, B = initial.shape
+    out_indptr, out_edges, targets = edge_order
+    final_uninfected = np.empty((N, B))
+    cols = np.arange(B) #columns of the block that are still iterating
+    uninfected = 1.0 - initial #probabilty that node hasn't been infected yet
+    last_infected = np.array(initial, dtype=float) #probability that node was infected on last timestep
+    infected_nodes = np.flatnonzero(last_infected.any(axis=1)) #nodes with nonzero last_infected in some column
+    change = last_infected.max(axis=0) #relative change of uninfected over the last timestep (from 1 to 1 - initial)
+
+    t = 0
+    while cols.size > 0:
+        if Niter >= 1:
+            running = np.full(cols.size, t < Niter)
+        else:
+            running = change > tol
+        if not np.all(running): #retire the columns that have finished
+            final_uninfected[:, cols[~running]] = uninfected[:, ~running]
+            cols = cols[running]
+            uninfected = uninfected[:, running]
+            last_infected = last_infected[:, running]
+            change = change[running]
+            if column_betas is not None:
+                column_betas = column_betas[running]
+            if cols.size == 0:
+                break
+            infected_nodes = infected_nodes[last_infected[infected_nodes].any(axis=1)]
+
+        spreading = infected_nodes if threshold <= 0 else infected_nodes[(last_infected[infected_nodes] > threshold).any(axis=1)]
+        positions, _ = gather_ranges(out_indptr, spreading)
+        positions = np.sort(out_edges[positions]) #connections sent by spreading nodes, grouped by target node in incoming CSR order
+        updated, starts = np.unique(targets[positions], return_index=True)
+        summer = sparse.csr_matrix((np.ones(positions.size), np.arange(positions.size), np.append(starts, positions.size)), shape=(updated.size, positions.size))
+        source_infected = last_infected[indices[positions]]
+        if threshold > 0:
+            source_infected[source_infected <= threshold] = 0 #columns in which the source is below the threshold
+        connection_probs = beta_weights[positions, None] * source_infected
+        if column_betas is not None:
+            connection_probs *= column_betas
+        log_uninfected = summer @ np.log1p(-connection_probs) #log prob that each node escapes all of its incoming connections this timestep
+        prev_uninfected = uninfected[updated]
+        cur_infected = -np.expm1(log_uninfected) * prev_uninfected
+        uninfected[updated] = prev_uninfected - cur_infected
+        last_infected[infected_nodes] = 0
+        last_infected[updated] = cur_infected
+        infected_nodes = updated[cur_infected.any(axis=1)]
+        change = _max_relative_change(prev_uninfected, uninfected[updated]) if updated.size > 0 else np.zeros(cols.size)
+        t = t+1
+
+    return final_uninfected
+
+def _seed_chunk(edge_order, indices, beta_weights, seeds, Niter, tol, threshold = 0.0):
+    ''' Viral centrality of the given block of seed nodes. '''
+    N = len(edge_order[0])-1
+    initial = np.zeros((N, seeds.size))
+    initial[seeds, np.arange(seeds.size)] = 1
+    uninfected = _run_block(edge_order, indices, beta_weights, initial, Niter, tol, threshold=threshold)
+    return np.sum(1 - uninfected, axis=0) - 1 #don't want to include seed node infection in total
+
+def _worker_setup(indptr, indices, weights, beta):
+    ''' Per-worker state of viral_centrality_csr, derived from the memory-mapped CSR arrays (see csr.shared_array_pool). '''
+    return {'indices': indices, 'edge_order': out_edge_order(indptr, indices), 'beta_weights': beta * np.asarray(weights, dtype=float)}
+
+def _worker_chunk(start, stop, Niter, tol, threshold):
+    return _seed_chunk(worker_state['edge_order'], worker_state['indices'], worker_state['beta_weights'], np.arange(start, stop), Niter, tol, threshold)
+
+def viral_centrality_csr(indptr, indices, weights, Niter = 5, beta = 1.0, tol = 0.0001, chunk_size = 64, workers = None, threshold = 0.0):
+    ''' Same measure as viral_centrality, computed from the incoming connections in CSR form (as returned by adjacency_to_csr(inList, inWeight)).
+    Rather than looping over nodes and connections, each timestep updates the reached nodes at once in log space:
+    log(prob_uninfected[i]) = sum over incoming connections j->i of log(1 - beta*w_ji*last_infected[j]), evaluated as one sparse product
+    over the connections sent by nodes with nonzero last_infected. Nodes outside the seed node's reach are never visited, just as they
+    are skipped by the BFS in viral_centrality, and the result agrees with viral_centrality to floating point rounding.
+    Seeds are advanced 'chunk_size' at a time as the columns of N x chunk_size state matrices; each seed still stops on its own
+    relative tolerance check. Besides the state matrices, memory is about (connections visited in a timestep) x chunk_size floats.
+    If 'workers' is greater than 1, the seed chunks are spread over a pool of that many processes. The CSR arrays are written once to a
+    temporary directory and memory-mapped by every worker; since the chunks are the same as in the serial run, so are the results.
+    Niter and tol have the same meaning as in viral_centrality; for 'threshold' see viral_centrality_frontier. '''
+
+    N = len(indptr)-1
+    avg_infections = np.zeros(N)
+    chunks = [(start, min(start+chunk_size, N)) for start in range(0, N, chunk_size)]
+
+    if workers is None or workers <= 1:
+        indices = np.asarray(indices)
+        edge_order = out_edge_order(indptr, indices)
+        beta_weights = beta * np.asarray(weights, dtype=float)
+        for start, stop in chunks:
+            avg_infections[start:stop] = _seed_chunk(edge_order, indices, beta_weights, np.arange(start, stop), Niter, tol, threshold)
+        return avg_infections
+
+    with shared_array_pool(workers, {'indptr': indptr, 'indices': indices, 'weights': weights}, functools.partial(_worker_setup, beta=beta)) as pool:
+        futures = [pool.submit(_worker_chunk, start, stop, Niter, tol, threshold) for start, stop in chunks]
+        for (start, stop), future in zip(chunks, futures):
+            avg_infections[start:stop] = future.result()
+
+    return avg_infections
+
+def viral_centrality_frontier(indptr, indices, weights, Niter = 5, beta = 1.0, tol = 0.0001, threshold = 0.0, chunk_size = 64, workers = None):
+    ''' Viral centrality in which each timestep only spreads from the frontier: the nodes whose last_infected probability is above
+    'threshold'. With threshold = 0 this is viral_centrality_csr, which already visits only the connections of infected nodes; a
+    positive threshold drops the spread from nodes whose last_infected is at most 'threshold' on that timestep, which underestimates
+    the result but cuts the work per timestep on sparse, long-diameter networks. Arguments are otherwise as in viral_centrality_csr. '''
+    return viral_centrality_csr(indptr, indices, weights, Niter = Niter, beta = beta, tol = tol, chunk_size = chunk_size, workers = workers, threshold = threshold)
+
+def _upper_bounds(summer, indices, beta_weights, adjacency, max_strength, seeds, bound_steps):
+    ''' Upper bounds on the viral centrality of the given seeds (for any Niter and tol), from 'bound_steps' exact timesteps followed by a
+    linear bound on the remaining spread. Since 1 - prod(1 - y) <= sum(y), the infection probabilities on every later timestep satisfy
+    cur_infected <= adjacency @ last_infected, and no node can be infected with more than its current uninfected probability.
+    After another 'bound_steps' linear steps the rest is bounded geometrically by the largest beta-scaled out-strength 'max_strength'
+    (infinite if it is 1 or more, in which case only the uninfected cap applies). '''
+
+    N = summer.shape[0]
+    uninfected = np.ones((N, seeds.size))
+    uninfected[seeds, np.arange(seeds.size)] = 0
+    last_infected = 1.0 - uninfected
+    for t in range(bound_steps): #exact timesteps
+        cur_infected = -np.expm1(summer @ np.log1p(-beta_weights[:, None] * last_infected[indices])) * uninfected
+        uninfected = uninfected - cur_infected
+        last_infected = cur_infected
+
+    bound_infected = last_infected
+    future = np.zeros_like(uninfected)
+    for t in range(bound_steps): #linear bound timesteps
+        bound_infected = np.minimum(adjacency @ bound_infected, uninfected)
+        future += bound_infected
+    if max_strength < 1:
+        remainder = bound_infected.sum(axis=0) * max_strength / (1 - max_strength)
+    else:
+        remainder = np.inf
+    future_total = np.minimum(np.minimum(future, uninfected).sum(axis=0) + remainder, uninfected.sum(axis=0))
+    return np.sum(1 - uninfected, axis=0) - 1 + future_total
+
+def viral_centrality_top_k(indptr, indices, weights, k, Niter = 5, beta = 1.0, tol = 0.0001, chunk_size = 64, bound_steps = 3):
+    ''' The k seed nodes with the highest viral centrality (as computed by viral_centrality_csr), without computing every seed exactly.
+    A cheap upper bound is computed for every seed first (see _upper_bounds); seeds are then refined in order of decreasing bound,
+    'chunk_size' at a time, until the next bound falls below the k-th largest exact value found so far. No pruned seed can make the top k.
+    Returns the top k nodes ranked by decreasing viral centrality, their exact values, and the number of seeds that were refined. '''
+
+    N = len(indptr)-1
+    k = min(k, N)
+    if k <= 0:
+        return np.zeros(0, dtype=int), np.zeros(0), 0
+    indices = np.asarray(indices)
+    summer = _in_edge_summer(indptr)
+    edge_order = out_edge_order(indptr, indices)
+    beta_weights = beta * np.asarray(weights, dtype=float)
+    adjacency = sparse.csr_matrix((beta_weights, indices, indptr), shape=(N, N)) #adjacency[i,j] = beta * weight of connection j->i
+    max_strength = np.max(np.asarray(adjacency.sum(axis=0))) if N > 0 else 0.0
+
+    bounds = np.zeros(N)
+    for start in range(0, N, chunk_size):
+        seeds = np.arange(start, min(start+chunk_size, N))
+        bounds[seeds] = _upper_bounds(summer, indices, beta_weights, adjacency, max_strength, seeds, bound_steps)
+
+    order = np.argsort(-bounds, kind='stable')
+    refined = np.zeros(0, dtype=int)
+    values = np.zeros(0)
+    for start in range(0, N, chunk_size):
+        if refined.size >= k and bounds[order[start]] < np.sort(values)[-k]:
+            break
+        seeds = order[start:start+chunk_size]
+        refined = np.concatenate((refined, seeds))
+        values = np.concatenate((values, _seed_chunk(edge_order, indices, beta_weights, seeds, Niter, tol)))
+
+    ranked = np.lexsort((refined, -values))[:k]
+    return refined[ranked], values[ranked], refined.size
+
+def viral_centrality_low_memory(indptr, indices, weights, Niter = 5, beta = 1.0, tol = 0.0001, chunk_size = 64, dtype = np.float32):
+    ''' Low-memory variant of viral_centrality_csr. The state of a block of 'chunk_size' seeds lives in one workspace that is allocated
+    once and reused for every block: uninfected and prev_uninfected are swapped rather than copied each timestep, per-connection
+    quantities are computed in place, and seeds that meet the relative tolerance are swapped to the end of the block instead of
+    being copied out. Only the sparse product itself allocates (an N x chunk_size array per timestep).
+    With dtype = np.float32 the workspace takes half the memory. Each timestep then adds a relative error of at most about
+    (d+4)*2**-24 to the infection probabilities of a node with d incoming connections, so a seed's result differs from the float64
+    result by at most about N*T*(d_max+4)*2**-24 after T timesteps (plus, in tolerance mode, the change of one timestep if the
+    convergence check happens to stop one timestep earlier or later). In practice the difference is far smaller: at most about 5e-6
+    for the Congress network, both with tol = 0.001 and with Niter = 5. '''
+
+    N = len(indptr)-1
+    E = len(indices)
+    indices = np.asarray(indices)
+    summer_T = _in_edge_summer(indptr).T.astype(dtype).tocsr() #E x N; (x @ summer_T)[b,i] sums x[b,:] over the incoming connections of node i
+    beta_weights = (beta * np.asarray(weights, dtype=float)).astype(dtype)
+    B = max(1, min(chunk_size, N))
+
+    #workspace: one row per seed of the block, so that the seeds still iterating are always the leading rows
+    uninfected = np.empty((B, N), dtype=dtype)
+    prev_uninfected = np.empty((B, N), dtype=dtype)
+    last_infected = np.empty((B, N), dtype=dtype)
+    rel_change = np.empty((B, N), dtype=dtype)
+    connection_probs = np.empty((B, E), dtype=dtype)
+
+    avg_infections = np.zeros(N)
+
+    for start in range(0, N, B):
+        seeds = np.arange(start, min(start+B, N))
+        n = seeds.size #number of seeds of the block still iterating
+        uninfected[:n] = 1
+        uninfected[np.arange(n), seeds] = 0
+        prev_uninfected[:n] = 1
+        last_infected[:n] = 0
+        last_infected[np.arange(n), seeds] = 1
+
+        t = 0
+        while n > 0:
+            if Niter >= 1:
+                running = np.full(n, t < Niter)
+            else:
+                np.subtract(prev_uninfected[:n], uninfected[:n], out=rel_change[:n])
+                np.divide(rel_change[:n], prev_uninfected[:n], out=rel_change[:n], where=prev_uninfected[:n] > 0)
+                running = rel_change[:n].max(axis=1) > tol
+            for row in np.flatnonzero(~running)[::-1]: #retire finished seeds by swapping them behind the rows still iterating
+                n -= 1
+                avg_infections[seeds[row]] = np.sum(1 - uninfected[row], dtype=float) - 1 #don't want to include seed node infection in total
+                for state in (uninfected, prev_uninfected, last_infected):
+                    state[[row, n]] = state[[n, row]]
+                seeds[[row, n]] = seeds[[n, row]]
+            if n == 0:
+                break
+
+            np.take(last_infected[:n], indices, axis=1, out=connection_probs[:n])
+            np.multiply(connection_probs[:n], beta_weights, out=connection_probs[:n])
+            np.negative(connection_probs[:n], out=connection_probs[:n])
+            np.log1p(connection_probs[:n], out=connection_probs[:n])
+            log_uninfected = connection_probs[:n] @ summer_T #log prob that each node escapes all of its incoming connections this timestep
+            np.expm1(log_uninfected, out=last_infected[:n])
+            np.negative(last_infected[:n], out=last_infected[:n])
+            np.multiply(last_infected[:n], uninfected[:n], out=last_infected[:n]) #last_infected now holds cur_infected
+            np.subtract(uninfected[:n], last_infected[:n], out=prev_uninfected[:n])
+            uninfected, prev_uninfected = prev_uninfected, uninfected #swap buffers rather than copying
+            t = t+1
+
+    return avg_infections
+
+def viral_centrality_beta_sweep(indptr, indices, weights, betas, Niter = 5, tol = 0.0001, chunk_size = 64):
+    ''' Viral centrality of every seed node for each value in 'betas', in one pass over the seed nodes.
+    Each block holds every beta for a group of seeds side by side as columns of the same N x B state matrices, so the
+    connection gathers and sparse products of a timestep are shared by all betas; each column still stops on its own
+    relative tolerance check. 'chunk_size' caps the number of columns per block (at least one seed with all its betas).
+    Returns an N x len(betas) array whose column m matches viral_centrality_csr(..., beta = betas[m]). '''
+
+    N = len(indptr)-1
+    betas = np.asarray(betas, dtype=float)
+    M = betas.size
+    indices = np.asarray(indices)
+    edge_order = out_edge_order(indptr, indices)
+    weights = np.asarray(weights, dtype=float)
+    seeds_per_block = max(1, chunk_size // max(M, 1))
+
+    avg_infections = np.zeros((N, M))
+    for start in range(0, N, seeds_per_block):
+        seeds = np.arange(start, min(start+seeds_per_block, N))
+        initial = np.zeros((N, seeds.size*M))
+        initial[np.repeat(seeds, M), np.arange(seeds.size*M)] = 1
+        uninfected = _run_block(edge_order, indices, weights, initial, Niter, tol, column_betas = np.tile(betas, seeds.size))
+        avg_infections[seeds] = (np.sum(1 - uninfected, axis=0) - 1).reshape(seeds.size, M) #don't want to include seed node infection in total
+
+    return avg_infections
+
+def seed_set_spread(indptr, indices, weights, seed_sets, Niter = 5, beta = 1.0, tol = 0.0001):
+    ''' Viral centrality generalized to sets of seed nodes: for each set in 'seed_sets', the expected total number of infected nodes
+    (seeds included) when every node of the set starts out infected, ie with last_infected = 1 and uninfected = 0 on all of them.
+    For a single seed this is its viral centrality plus one. All sets are advanced together as one block. '''
+
+    N = len(indptr)-1
+    initial = np.zeros((N, len(seed_sets)))
+    for b, seed_set in enumerate(seed_sets):
+        initial[list(seed_set), b] = 1
+    indices = np.asarray(indices)
+    uninfected = _run_block(out_edge_order(indptr, indices), indices, beta * np.asarray(weights, dtype=float), initial, Niter, tol)
+    return np.sum(1 - uninfected, axis=0)
+
+def select_seed_set(indptr, indices, weights, k, Niter = 5, beta = 1.0, tol = 0.0001):
+    ''' Greedy choice of k seed nodes maximizing seed_set_spread, using CELF lazy evaluation (Leskovec et al., 2007).
+    Candidates sit in a priority queue keyed on their last computed marginal gain; only the top candidate is re-evaluated
+    against the current seed set, and it is accepted if its gain is still up to date. When the spread is submodular, stale
+    gains are upper bounds and the result is the same as plain greedy; ties go to the lower node index, so the answer is deterministic.
+    Returns the seed nodes (in the order they were picked) and the spread of the final set. '''
+
+    N = len(indptr)-1
+    single_spreads = viral_centrality_csr(indptr, indices, weights, Niter = Niter, beta = beta, tol = tol) + 1
+    queue = [(-gain, node, 0) for node, gain in enumerate(single_spreads)] #(-marginal gain, node, size of seed set the gain was computed for)
+    heapq.heapify(queue)
+
+    seeds = []
+    spread = 0.0
+    while len(seeds) < min(k, N):
+        neg_gain, node, computed_for = heapq.heappop(queue)
+        if computed_for == len(seeds):
+            seeds.append(node)
+            spread -= neg_gain
+            continue
+        gain = seed_set_spread(indptr, indices, weights, [seeds + [node]], Niter = Niter, beta = beta, tol = tol)[0] - spread
+        heapq.heappush(queue, (-gain, node, len(seeds)))
+
+    return seeds, spread
+
+def seed_reachability(indptr, indices):
+    ''' Which nodes every seed node can reach along outgoing connections (the nodes its 'seed_distance' BFS rings in viral_centrality
+    ever include), computed from the incoming connections in CSR form with one breadth-first search per seed. Row s is a bitset packed
+    with np.packbits: node n is reachable from s if bit n of row s is set. At N**2/8 bytes this is 64 times smaller than a matrix of
+    distances. Cache it alongside the viral centrality values to use viral_centrality_incremental later on. '''
+    N = len(indptr)-1
+    out_adjacency = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(N, N)).T.tocsr() #row j holds the nodes j sends connections to
+    reachability = np.zeros((N, (N + 7) // 8), dtype=np.uint8)
+    reached = np.zeros(N, dtype=bool)
+    for seed in range(N):
+        reached[:] = False
+        reached[csgraph.breadth_first_order(out_adjacency, seed, directed=True, return_predecessors=False)] = True
+        reachability[seed] = np.packbits(reached)
+    return reachability
+
+def _reaching(indptr, indices, nodes):
+    ''' Every node that can reach at least one of 'nodes' along outgoing connections (including 'nodes' themselves), by one
+    breadth-first search backwards along the incoming connections in CSR form. '''
+    reached = np.zeros(len(indptr)-1, dtype=bool)
+    reached[nodes] = True
+    frontier = np.asarray(nodes)
+    while frontier.size > 0:
+        positions, _ = gather_ranges(indptr, frontier)
+        frontier = np.unique(indices[positions])
+        frontier = frontier[~reached[frontier]]
+        reached[frontier] = True
+    return np.flatnonzero(reached)
+
+def viral_centrality_incremental(indptr, indices, weights, avg_infections, reachability, changed_edges, Niter = 5, beta = 1.0, tol = 0.0001, chunk_size = 64):
+    ''' Updates the viral centrality values 'avg_infections' (from viral_centrality_csr) after the weights of a few connections have changed.
+    'weights' must already hold the new weights, 'reachability' is the output of seed_reachability for the same network (or None), and
+    'changed_edges' is a list of (source, target) pairs whose weights changed. Only seeds whose reach contains the source of a changed
+    connection can be affected, so only those are recomputed; all other values are copied over. Without a cached 'reachability' those
+    seeds are found by one backward breadth-first search from the changed sources. The connections themselves must be unchanged
+    (adding or removing connections changes reachability, so seed_reachability has to be rerun in that case).
+    Returns the updated values and the array of recomputed seeds. '''
+
+    avg_infections = np.array(avg_infections, dtype=float)
+    sources = np.unique([source for source, target in changed_edges]).astype(int)
+    if sources.size == 0:
+        return avg_infections, sources
+    indices = np.asarray(indices)
+    if reachability is None:
+        stale_seeds = _reaching(indptr, indices, sources)
+    else:
+        bits = (reachability[:, sources // 8] >> (7 - sources % 8).astype(np.uint8)) & 1
+        stale_seeds = np.flatnonzero(bits.any(axis=1))
+
+    edge_order = out_edge_order(indptr, indices)
+    beta_weights = beta * np.asarray(weights, dtype=float)
+    for start in range(0, stale_seeds.size, chunk_size):
+        seeds = stale_seeds[start:start+chunk_size]
+        avg_infections[seeds] = _seed_chunk(edge_order, indices, beta_weights, seeds, Niter, tol)
+
+    return avg_infections, stale_seeds
+
+def viral_centrality_sparse(inList, inWeight, outList, Niter = 5, beta = 1.0, tol = 0.0001, chunk_size = 64, workers = None):
+    ''' Drop-in replacement for viral_centrality that runs on the sparse engine (viral_centrality_csr).
+    outList is accepted for compatibility but not needed, since reachability is implied by the sparse update. '''
+
+    indptr, indices, weights = adjacency_to_csr(inList, inWeight)
+    return viral_centrality_csr(indptr, indices, weights, Niter = Niter, beta = beta, tol = tol, chunk_size = chunk_size, workers = workers)
+
+def _viral_centrality_kernel(in_indptr, in_indices, in_weights, out_indptr, out_indices, seeds, Niter, beta, tol):
+    ''' The loops of viral_centrality on flat CSR arrays, for the given seed nodes. Written so that numba can compile it,
+    but it also runs (slowly) as plain Python. All work arrays are allocated once and reset for each seed. '''
+
+    N = len(in_indptr)-1
+    avg_infections = np.zeros(len(seeds))
+    prev_uninfected = np.ones(N)
+    uninfected = np.ones(N)
+    last_infected = np.zeros(N)
+    cur_infected = np.zeros(N)
+    bfs_queue = -1 * np.ones(N, dtype=np.int64)
+    seed_distance = -1 * np.ones(N, dtype=np.int64)
+
+    for k in range(len(seeds)):
+        seed = seeds[k]
+        prev_uninfected[:] = 1
+        uninfected[:] = 1
+        last_infected[:] = 0
+        cur_infected[:] = 0
+        bfs_queue[:] = -1
+        seed_distance[:] = -1
+        last_infected[seed] = 1
+        uninfected[seed] = 0
+        bfs_queue[0] = seed
+        seed_distance[seed] = 0
+        read = 0
+        write = 1
+
+        t = 0
+        while True:
+            if Niter >= 1:
+                if t >= Niter:
+                    break
+            else:
+                max_change = 0.0 #relative tolerance check over the nodes reached so far, skipping nodes with prev_uninfected = 0 like np.nanmax
+                for q in range(write):
+                    node = bfs_queue[q]
+                    if prev_uninfected[node] > 0:
+                        change = (prev_uninfected[node] - uninfected[node]) / prev_uninfected[node]
+                        if change > max_change:
+                            max_change = change
+                if not max_change > tol:
+                    break
+            for q in range(write):
+                node = bfs_queue[q]
+                prev_uninfected[node] = uninfected[node]
+
+            #expand BFS to find next ring of nodes that are within seed node's reach
+            if read != write:
+                write_start = write
+                while read < write_start:
+                    source = bfs_queue[read]
+                    for e in range(out_indptr[source], out_indptr[source+1]):
+                        neighb = out_indices[e]
+                        if seed_distance[neighb] < 0:
+                            seed_distance[neighb] = t+1
+                            bfs_queue[write] = neighb
+                            write += 1
+                    read += 1
+
+            for q in range(write):
+                node = bfs_queue[q]
+                prob_uninfected = 1.0
+                for e in range(in_indptr[node], in_indptr[node+1]):
+                    prob_uninfected = prob_uninfected*(1-(last_infected[in_indices[e]]*(beta*in_weights[e])))
+                cur_infected[node] = (1-prob_uninfected)*uninfected[node]
+
+            for q in range(write):
+                node = bfs_queue[q]
+                last_infected[node] = cur_infected[node]
+                uninfected[node] = uninfected[node] - cur_infected[node]
+
+            t = t+1
+
+        total = 0.0
+        for node in range(N):
+            total += 1 - uninfected[node]
+        avg_infections[k] = total - 1 #don't want to include seed node infection in total
+
+    return avg_infections
+
+_viral_centrality_kernel_jit = numba.njit(cache=True)(_viral_centrality_kernel) if numba is not None else None
+
+def viral_centrality_compiled(inList, inWeight, outList, Niter = 5, beta = 1.0, tol = 0.0001):
+    ''' Same arguments and results as viral_centrality, with the inner loops compiled by numba over flat CSR arrays.
+    If numba is not installed, this simply calls viral_centrality. '''
+
+    if _viral_centrality_kernel_jit is None:
+        return viral_centrality(inList, inWeight, outList, Niter = Niter, beta = beta, tol = tol)
+    in_indptr, in_indices, in_weights = adjacency_to_csr(inList, inWeight)
+    out_indptr, out_indices, _ = adjacency_to_csr(outList)
+    seeds = np.arange(len(inList))
+    return _viral_centrality_kernel_jit(in_indptr, in_indices, in_weights, out_indptr, out_indices, seeds, Niter, float(beta), float(tol))